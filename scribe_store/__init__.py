@@ -12,6 +12,7 @@ class RowStatus(models.TextChoices):
     IGNORED = "I", "Ignored"
     DELETED = "D", "Deleted"
     UNKNOWN = "X", "Unknown"
+    ERROR = "E", "Error"
 
 
 __all__ = ["RowStatus"]
@@ -1,13 +1,56 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.contenttypes.models import ContentType
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
 from django.urls import reverse
+from django.utils.html import escape
 from django.utils.safestring import mark_safe
 
-from scribe_store.models import ScribeRow
+from scribe_store.models import ScribeRow, ScribeStore
 
 from . import models
 
 
+class EstimatedCountPaginator(Paginator):
+    """Use the planner's row estimate to count an unfiltered big table.
+
+    ``COUNT(*)`` scans the whole table on PostgreSQL. Filtered querysets and
+    tables smaller than ``threshold`` are counted exactly.
+    """
+
+    threshold = 100000
+
+    @cached_property
+    def count(self):
+        estimate = self.get_estimate()
+        if estimate is None or estimate < self.threshold:
+            return super().count
+        return estimate
+
+    def get_estimate(self):
+        queryset = self.object_list
+        if not hasattr(queryset, "query") or queryset.query.where:
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+        return row[0] if row and row[0] >= 0 else None
+
+
+class ScribeTargetInline(admin.TabularInline):
+    model = models.ScribeTarget
+    extra = 0
+
+
 @admin.register(models.ScribeSource)
 class ScribeSourceAdmin(admin.ModelAdmin):
     list_display = (
@@ -17,6 +60,28 @@ class ScribeSourceAdmin(admin.ModelAdmin):
         "target",
     )
     list_filter = ("data_type", "target")
+    inlines = [ScribeTargetInline]
+
+
+class ScribePartInline(admin.TabularInline):
+    model = models.ScribePart
+    extra = 0
+    can_delete = False
+    readonly_fields = [
+        "index",
+        "url",
+        "file",
+        "size",
+        "row_count",
+        "offset",
+        "status",
+        "completed_at",
+        "checkpoint",
+        "counts",
+    ]
+
+    def has_add_permission(self, request, obj):
+        return False
 
 
 @admin.action(description="Delete data created by this file")
@@ -25,6 +90,35 @@ def delete_created(modeladmin, request, queryset):
         datastore.delete_created()
 
 
+@admin.action(description="Archive rows of completed stores")
+def archive_rows(modeladmin, request, queryset):
+    for datastore in queryset.filter(status=models.ScribeStore.Status.COMPLETED):
+        datastore.archive_rows()
+
+
+@admin.action(description="Restore archived rows")
+def restore_rows(modeladmin, request, queryset):
+    for datastore in queryset.filter(archived_at__isnull=False):
+        datastore.restore_rows()
+
+
+@admin.action(description="Export related objects as CSV")
+def export_csv(modeladmin, request, queryset):
+    if queryset.count() != 1:
+        modeladmin.message_user(
+            request, "Select one store to export.", level=messages.WARNING
+        )
+        return None
+    datastore = queryset.get()
+    return StreamingHttpResponse(
+        datastore.iter_csv(),
+        content_type="text/csv",
+        headers={
+            "Content-Disposition": 'attachment; filename="%s.csv"' % datastore.slug
+        },
+    )
+
+
 @admin.register(models.ScribeStore)
 class ScribeStoreAdmin(admin.ModelAdmin):
     list_display = (
@@ -35,16 +129,48 @@ class ScribeStoreAdmin(admin.ModelAdmin):
         "downloaded_at",
         "completed_at",
         "status",
+        "size",
+        "row_count",
+        "get_rows_per_sec",
+        "created_count",
+        "updated_count",
+        "ignored_count",
+        "error_count",
+        "archived_at",
     )
     list_filter = ("source",)
-    actions = [delete_created]
+    readonly_fields = [
+        "size",
+        "row_count",
+        "created_count",
+        "updated_count",
+        "ignored_count",
+        "deleted_count",
+        "unknown_count",
+        "error_count",
+        "get_metrics_formatted",
+        "archive",
+        "archived_at",
+        "deferred_indexes",
+        "profile",
+    ]
+    exclude = ["metrics"]
+    inlines = [ScribePartInline]
+    actions = [delete_created, archive_rows, restore_rows, export_csv]
 
 
 @admin.register(models.ScribeRow)
 class ScribeRowAdmin(admin.ModelAdmin):
     list_display = ("__str__", "object_index", "status", "get_target_link")
+    list_filter = ("status",)
+    list_select_related = ("store__source", "content_type")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ["get_target_link", "get_data_formatted"]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related("target")
+
     def get_fields(self, request, obj):
         fields = super().get_fields(request, obj)
         if fields[-2:] == ["get_target_link", "get_data_formatted"]:
@@ -54,38 +180,57 @@ class ScribeRowAdmin(admin.ModelAdmin):
 
 class ScribeAdminMixin:
     def get_scribe_row_admin_link(self, row):
+        if row.pk is None:
+            return "%s (archived)" % escape(row)
         admin_url = reverse(
             "admin:%s_%s_change" % ("scribe_store", "scriberow"),
-            args=[row.object_id],
+            args=[row.pk],
         )
         return mark_safe('<a href="%s">%s</a>' % (admin_url, row))
 
+    def get_scribe_rows(self, obj, archived=True):
+        """ScribeRows of ``obj``, and rows of archived stores if ``archived``.
+
+        Finding archived rows reads the archives of the target, so they are
+        only shown on the change view, and read once per object.
+        """
+        if archived and hasattr(obj, "_scribe_rows"):
+            return obj._scribe_rows
+        content_type = ContentType.objects.get_for_model(obj.__class__)
+        rows = list(
+            ScribeRow.objects.filter(content_type=content_type, object_id=obj.pk)
+        )
+        if not archived:
+            return rows
+        stores = ScribeStore.objects.filter(archived_at__isnull=False).filter(
+            Q(source__target=content_type)
+            | Q(source__target_set__content_type=content_type)
+        )
+        for store in stores.distinct():
+            rows.extend(
+                row for row in store.iter_rows(content_type) if row.object_id == obj.pk
+            )
+        obj._scribe_rows = rows
+        return rows
+
+    def format_scribe_rows(self, rows):
+        return mark_safe("<br>".join([self.get_scribe_row_admin_link(r) for r in rows]))
+
+    @admin.display(description="scribe row", empty_value="")
+    def scribe_row_list(self, obj):
+        return self.format_scribe_rows(self.get_scribe_rows(obj, archived=False))
+
     @admin.display(empty_value="")
     def scribe_row(self, obj):
-        try:
-            row = ScribeRow.objects.filter(
-                content_type=ContentType.objects.get_for_model(obj.__class__),
-                object_id=obj.id,
-            ).all()
-            return mark_safe(
-                "<br>".join([self.get_scribe_row_admin_link(r) for r in row])
-            )
-        except ScribeRow.DoesNotExist:
-            return None
+        return self.format_scribe_rows(self.get_scribe_rows(obj))
 
     @admin.display(empty_value="")
     def scribe_data(self, obj):
-        try:
-            row = ScribeRow.objects.filter(
-                content_type=ContentType.objects.get_for_model(obj.__class__),
-                object_id=obj.id,
-            ).all()
-            return mark_safe("<br>".join([r.get_data_formatted() for r in row]))
-        except ScribeRow.DoesNotExist:
-            return None
+        rows = self.get_scribe_rows(obj)
+        return mark_safe("<br>".join([r.get_data_formatted() for r in rows]))
 
     def get_list_display(self, request):
-        return super().get_list_display(request) + ["scribe_row"]
+        return super().get_list_display(request) + ["scribe_row_list"]
 
     def get_readonly_fields(self, request, obj):
         return super().get_readonly_fields(request, obj) + ("scribe_row", "scribe_data")
@@ -0,0 +1,56 @@
+"""Async fetch for ASGI deployments.
+
+``httpx`` is an optional dependency. Responses are streamed into a temporary
+file in an executor, and storage and database work is done by
+``sync_to_async``, so the event loop is never blocked.
+
+Without a ``client``, each fetch opens its own ``httpx.AsyncClient`` and
+closes it when the download is done.
+"""
+
+import asyncio
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.core.files import File
+
+from .exceptions import BadHttpStatusException, ScribeException
+
+
+def new_client():
+    """Return a new ``httpx.AsyncClient``, to be closed by the caller."""
+    try:
+        import httpx
+    except ImportError:
+        raise ScribeException(
+            "httpx is required for async fetch. Install django-scribe-store[async]."
+        )
+    return httpx.AsyncClient()
+
+
+async def afetch(source, client=None):
+    """Download a new store of ``source`` and return it."""
+    from .models import ScribeStore
+
+    if source.data_type != source.DataType.CSV:
+        raise ScribeException("Only CSV sources can be fetched asynchronously.")
+    if client is None:
+        async with new_client() as client:
+            return await afetch(source, client)
+    loop = asyncio.get_running_loop()
+    store = ScribeStore(source=source, url=source.current_url)
+    with tempfile.TemporaryFile() as tmp:
+        size = 0
+        with store.phases.time("download"):
+            async with client.stream("GET", store.url) as response:
+                if response.status_code != 200:
+                    raise BadHttpStatusException(
+                        "status code: %s" % response.status_code
+                    )
+                async for chunk in response.aiter_bytes():
+                    await loop.run_in_executor(None, tmp.write, chunk)
+                    size += len(chunk)
+        store.size = size
+        tmp.seek(0)
+        await sync_to_async(store.save_file)(File(tmp))
+    return store
@@ -0,0 +1,47 @@
+"""Compressed columnar archive of a store's ScribeRows.
+
+An archive is a gzip file of JSON lines. Each line is a row group: a dict of
+column name to a list of values, with up to chunk size rows. Row groups are
+written and read one by one, so memory is bounded by the chunk size.
+"""
+
+import gzip
+import json
+import tempfile
+
+from django.core.files import File
+
+from .utils import chunked, get_chunk_size
+
+COLUMNS = ("object_index", "status", "content_type_id", "object_id", "data", "message")
+
+
+def write_archive(fieldfile, name, groups):
+    """Write row groups to ``fieldfile`` through its storage."""
+    with tempfile.TemporaryFile() as tmp:
+        with gzip.open(tmp, "wt", encoding="utf-8") as fp:
+            for group in groups:
+                fp.write(json.dumps(group))
+                fp.write("\n")
+        tmp.seek(0)
+        fieldfile.save(name, File(tmp), save=False)
+
+
+def row_groups(values, size=None):
+    """Group tuples of ``COLUMNS`` values into columnar row groups."""
+    for chunk in chunked(values, size or get_chunk_size()):
+        yield {name: list(column) for name, column in zip(COLUMNS, zip(*chunk))}
+
+
+def read_archive(fieldfile):
+    """Yield row groups of an archive."""
+    with fieldfile.open("rb") as raw, gzip.open(raw, "rt", encoding="utf-8") as fp:
+        for line in fp:
+            yield json.loads(line)
+
+
+def iter_archive(fieldfile):
+    """Yield a dict of ``COLUMNS`` values per row."""
+    for group in read_archive(fieldfile):
+        for values in zip(*(group[name] for name in COLUMNS)):
+            yield dict(zip(COLUMNS, values))
@@ -0,0 +1,235 @@
+"""Database-native ingest backends.
+
+These backends bypass ``Model.save()`` and write converted rows straight to the
+target table. They are used by ``ScribeStore.load_csv`` when the source backend
+is ``NATIVE``. Like ``bulk_create``, model ``save()`` and signals are not called.
+"""
+
+import io
+import json
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, router
+
+from . import RowStatus
+from .exceptions import ScribeException
+from .models import ScribeRow
+
+
+class NativeBackend:
+    vendor = None
+
+    def __init__(self, store, model):
+        self.store = store
+        self.model = model
+        self.opts = self.model._meta
+        self.using = router.db_for_write(self.model)
+        self.connection = connections[self.using]
+        self.fields = [f for f in self.opts.concrete_fields if not f.primary_key]
+        self.content_type = ContentType.objects.get_for_model(self.model)
+
+    def quote(self, names):
+        return ", ".join(self.connection.ops.quote_name(name) for name in names)
+
+    def load_chunk(self, items):
+        """Insert ``(object_index, data, original)`` items and their lineage.
+
+        Return the primary keys of the inserted objects.
+        """
+        if not items:
+            return []
+        phases = self.store.phases
+        with phases.time("convert"):
+            objs = [self.model(**data) for _, data, _ in items]
+            pks = self.get_pks(objs)
+            values = [[pk] + self.get_values(obj) for pk, obj in zip(pks, objs)]
+        with phases.time("write"):
+            self.insert(
+                self.opts.db_table,
+                [self.opts.pk.column] + [f.column for f in self.fields],
+                values,
+            )
+        with phases.time("lineage"):
+            self.insert_lineage(
+                [object_index for object_index, _, _ in items],
+                [original for _, _, original in items],
+                pks,
+            )
+        return pks
+
+    def insert_lineage(self, indexes, datas, pks):
+        if router.db_for_write(ScribeRow) != self.using:
+            self.store.lineage_writer.write(
+                ScribeRow,
+                [
+                    ScribeRow(
+                        store=self.store,
+                        object_index=object_index,
+                        data=json.dumps(data),
+                        status=RowStatus.CREATED,
+                        content_type=self.content_type,
+                        object_id=pk,
+                    )
+                    for object_index, data, pk in zip(indexes, datas, pks)
+                ],
+            )
+            return
+        opts = ScribeRow._meta
+        data_field = opts.get_field("data")
+        self.insert(
+            opts.db_table,
+            [
+                opts.get_field(name).column
+                for name in (
+                    "store",
+                    "object_index",
+                    "data",
+                    "status",
+                    "content_type",
+                    "object_id",
+                    "message",
+                )
+            ],
+            [
+                [
+                    self.store.pk,
+                    object_index,
+                    data_field.get_db_prep_save(json.dumps(data), self.connection),
+                    RowStatus.CREATED.value,
+                    self.content_type.pk,
+                    pk,
+                    "",
+                ]
+                for object_index, data, pk in zip(indexes, datas, pks)
+            ],
+        )
+
+    def get_values(self, obj):
+        return [
+            f.get_db_prep_save(f.pre_save(obj, True), connection=self.connection)
+            for f in self.fields
+        ]
+
+    def get_pks(self, objs):
+        pk = self.opts.pk
+        pks = [pk.get_db_prep_save(obj.pk, self.connection) for obj in objs]
+        if all(v is not None for v in pks):
+            return pks
+        if self.opts.auto_field is None:
+            raise ScribeException(
+                "%s needs primary key values or an auto field." % self.model
+            )
+        if any(v is not None for v in pks):
+            raise ScribeException("Mixing given and generated primary keys.")
+        return self.allocate_pks(len(objs))
+
+    def prepare(self):
+        """Called once inside the load transaction."""
+
+    def allocate_pks(self, count):
+        raise NotImplementedError
+
+    def insert(self, table, columns, values):
+        raise NotImplementedError
+
+
+class PostgreSQLBackend(NativeBackend):
+    """Reserve ids from the table sequence and stream rows into ``COPY``."""
+
+    vendor = "postgresql"
+
+    def allocate_pks(self, count):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) "
+                "FROM generate_series(1, %s)",
+                [
+                    self.connection.ops.quote_name(self.opts.db_table),
+                    self.opts.pk.column,
+                    count,
+                ],
+            )
+            return [pk for (pk,) in cursor.fetchall()]
+
+    def insert(self, table, columns, values):
+        sql = "COPY %s (%s) FROM STDIN" % (
+            self.connection.ops.quote_name(table),
+            self.quote(columns),
+        )
+        with self.connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, "copy"):
+                # psycopg 3
+                with raw.copy(sql) as copy:
+                    for row in values:
+                        copy.write_row(row)
+            else:
+                # psycopg2
+                raw.copy_expert(sql, io.StringIO(self.copy_text(values)))
+
+    @staticmethod
+    def copy_text(values):
+        def text(value):
+            if value is None:
+                return "\\N"
+            if isinstance(value, bool):
+                return "t" if value else "f"
+            if hasattr(value, "adapted"):
+                # psycopg2.extras.Json
+                value = value.dumps(value.adapted)
+            return (
+                str(value)
+                .replace("\\", "\\\\")
+                .replace("\t", "\\t")
+                .replace("\n", "\\n")
+                .replace("\r", "\\r")
+            )
+
+        return "".join("\t".join(map(text, row)) + "\n" for row in values)
+
+
+class SQLiteBackend(NativeBackend):
+    """Assign ids after the current maximum and insert with ``executemany``."""
+
+    vendor = "sqlite"
+
+    def prepare(self):
+        with self.connection.cursor() as cursor:
+            # Foreign keys are checked once at commit instead of every row.
+            cursor.execute("PRAGMA defer_foreign_keys = ON")
+
+    def allocate_pks(self, count):
+        pk = self.quote([self.opts.pk.column])
+        table = self.quote([self.opts.db_table])
+        with self.connection.cursor() as cursor:
+            # A no-op write takes the write lock of the transaction first, so
+            # no other connection can insert between the read and the insert.
+            cursor.execute("UPDATE %s SET %s = %s WHERE 0" % (table, pk, pk))
+            cursor.execute("SELECT MAX(%s) FROM %s" % (pk, table))
+            start = cursor.fetchone()[0] or 0
+            cursor.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = %s", [self.opts.db_table]
+            )
+            seq = cursor.fetchone()
+            if seq is not None:
+                start = max(start, seq[0])
+        return list(range(start + 1, start + count + 1))
+
+    def insert(self, table, columns, values):
+        sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+            self.connection.ops.quote_name(table),
+            self.quote(columns),
+            ", ".join(["%s"] * len(columns)),
+        )
+        with self.connection.cursor() as cursor:
+            cursor.executemany(sql, values)
+
+
+BACKENDS = {backend.vendor: backend for backend in (PostgreSQLBackend, SQLiteBackend)}
+
+
+def get_backend(store, model):
+    vendor = connections[router.db_for_write(model)].vendor
+    if vendor not in BACKENDS:
+        raise ScribeException("Native backend is not available for %s." % vendor)
+    return BACKENDS[vendor](store, model)
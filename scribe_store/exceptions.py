@@ -0,0 +1,6 @@
+class BadHttpStatusException(Exception):
+    pass
+
+
+class ScribeException(Exception):
+    pass
@@ -0,0 +1,46 @@
+"""Stream the objects of a store back to CSV.
+
+Lineage is read with a server-side cursor and the target objects of each
+chunk are fetched with one query, so memory is bounded by the chunk size.
+"""
+
+import csv
+
+from django.contrib.contenttypes.models import ContentType
+
+from .utils import chunked, get_chunk_size
+
+LINEAGE_COLUMNS = ["object_index", "status", "data"]
+
+
+class Echo:
+    """File-like object whose ``write`` returns the value, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(store, model=None, status=None, chunk_size=None):
+    """Yield a CSV header and a line per ScribeRow of ``model`` in ``store``.
+
+    A line is the lineage (``object_index``, ``status`` and the original
+    ``data``) followed by the concrete fields of the object. The fields are
+    empty when there is no object, e.g. for an ERROR row.
+    """
+    model = model or store.ModelClass
+    chunk_size = chunk_size or get_chunk_size()
+    fields = model._meta.concrete_fields
+    writer = csv.writer(Echo())
+    yield writer.writerow(LINEAGE_COLUMNS + [f.attname for f in fields])
+    rows = store.iter_rows(ContentType.objects.get_for_model(model), status, chunk_size)
+    for chunk in chunked(rows, chunk_size):
+        objs = model._default_manager.in_bulk(
+            [row.object_id for row in chunk if row.object_id is not None]
+        )
+        for row in chunk:
+            obj = objs.get(row.object_id)
+            if obj is None:
+                values = [""] * len(fields)
+            else:
+                values = [getattr(obj, f.attname) for f in fields]
+            yield writer.writerow([row.object_index, row.status, row.data] + values)
@@ -0,0 +1,88 @@
+"""Content fingerprints of applied rows for idempotent reloads.
+
+A fingerprint is a 128-bit hash of a row's normalized data. The latest
+fingerprint is kept per source, target and object: the key value of the row
+for a source with a key, or the digest itself otherwise. A row whose digest
+is the latest one of its key is skipped and recorded as IGNORED with the
+object it produced, so a row going back to an earlier version is applied.
+"""
+
+import hashlib
+import json
+
+from . import RowStatus
+from .models import ScribeFingerprint
+
+
+def get_digest(data):
+    normalized = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+class FingerprintIndex:
+    def __init__(self, store, content_type, key=None):
+        self.store = store
+        self.content_type = content_type
+        self.key = key
+        self.fingerprints = ScribeFingerprint.objects.filter(
+            source=store.source, content_type=content_type
+        )
+
+    def get_key(self, original, digest):
+        if not self.key:
+            return digest
+        return str(original[self.key])
+
+    def split(self, items):
+        """Split ``(object_index, data, original)`` items into new and applied.
+
+        Applied items are ``(object_index, original, object_id)``. A row
+        repeated in the chunk is applied by its first occurrence.
+        """
+        digests = [get_digest(original) for _, _, original in items]
+        keys = [
+            self.get_key(original, digest)
+            for (_, _, original), digest in zip(items, digests)
+        ]
+        latest = {
+            key: (digest, object_id)
+            for key, digest, object_id in self.fingerprints.filter(
+                key__in=set(keys)
+            ).values_list("key", "digest", "object_id")
+        }
+        new, applied = [], []
+        for item, key, digest in zip(items, keys, digests):
+            latest_digest, object_id = latest.get(key, (None, None))
+            if digest == latest_digest:
+                applied.append((item[0], item[2], object_id))
+            else:
+                latest[key] = (digest, None)
+                new.append(item)
+        return new, applied
+
+    def add(self, results):
+        """Record ``(original, object_id, status)`` results of applied rows.
+
+        The fingerprint of a key is replaced by the latest applied row.
+        """
+        fingerprints = {}
+        for original, object_id, status in results:
+            if status == RowStatus.ERROR:
+                continue
+            digest = get_digest(original)
+            key = self.get_key(original, digest)
+            fingerprints[key] = ScribeFingerprint(
+                source=self.store.source,
+                content_type=self.content_type,
+                key=key,
+                digest=digest,
+                store=self.store,
+                object_id=object_id,
+            )
+        self.store.lineage_writer.write(
+            ScribeFingerprint,
+            fingerprints.values(),
+            update_conflicts=True,
+            unique_fields=["source", "content_type", "key"],
+            update_fields=["digest", "store", "object_id"],
+        )
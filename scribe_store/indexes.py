@@ -0,0 +1,169 @@
+"""Defer secondary indexes of the targets during a bulk initial load.
+
+Maintaining indexes row by row is the main cost of a first backfill. When a
+target is empty, or the file has at least ``SCRIBE_STORE_DEFER_INDEXES_ROWS``
+rows, its non-unique indexes are dropped before the load and recreated from
+their original DDL afterwards, whether the load succeeded or not.
+
+Unique and primary key indexes and indexes backing constraints are kept, so
+the load is checked as usual. Foreign keys are already checked at commit
+(deferrable constraints on PostgreSQL, ``defer_foreign_keys`` with the native
+SQLite backend). The DDL is saved to ``ScribeStore.deferred_indexes`` before
+anything is dropped, and ``ScribeStore.restore_indexes`` recreates what an
+interrupted process left behind.
+"""
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from .exceptions import ScribeException
+
+SAMPLE_SIZE = 64 * 1024
+
+
+def get_defer_rows():
+    return getattr(settings, "SCRIBE_STORE_DEFER_INDEXES_ROWS", None)
+
+
+def estimate_rows(store):
+    """Rows of the file of ``store``, estimated from its first bytes."""
+    if store.source.data_type == store.source.DataType.MANIFEST:
+        return sum(part.row_count or 0 for part in store.part_set.all())
+    if not store.file:
+        return None
+    with store.file.open("rb") as fp:
+        header = fp.readline()
+        sample = fp.read(SAMPLE_SIZE)
+    lines = sample.count(b"\n")
+    if not lines:
+        return 1 if sample.strip() else 0
+    return round((store.file.size - len(header)) / (len(sample) / lines))
+
+
+class TargetIndexes:
+    """Secondary indexes of the table of ``model``."""
+
+    vendor = None
+
+    def __init__(self, model):
+        self.model = model
+        self.using = router.db_for_write(model)
+        self.connection = connections[self.using]
+        self.table = model._meta.db_table
+
+    def get_indexes(self):
+        """Return ``(name, ddl)`` of the non-unique indexes."""
+        raise NotImplementedError
+
+    def get_names(self):
+        return {name for name, _ in self.get_indexes()}
+
+    def drop(self, indexes):
+        with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+            for name, _ in indexes:
+                cursor.execute("DROP INDEX %s" % self.connection.ops.quote_name(name))
+
+    def create(self, indexes):
+        existing = self.get_names()
+        with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+            for name, ddl in indexes:
+                if name not in existing:
+                    cursor.execute(ddl)
+
+
+class PostgreSQLIndexes(TargetIndexes):
+    vendor = "postgresql"
+
+    def get_indexes(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname, pg_get_indexdef(i.indexrelid) "
+                "FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE i.indrelid = %s::regclass "
+                "AND NOT i.indisunique AND NOT i.indisprimary "
+                "AND NOT EXISTS "
+                "(SELECT 1 FROM pg_constraint WHERE conindid = i.indexrelid) "
+                "ORDER BY c.relname",
+                [self.connection.ops.quote_name(self.table)],
+            )
+            return cursor.fetchall()
+
+
+class SQLiteIndexes(TargetIndexes):
+    vendor = "sqlite"
+
+    def get_indexes(self):
+        with self.connection.cursor() as cursor:
+            # Indexes of UNIQUE and PRIMARY KEY constraints have no SQL.
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master "
+                "WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL "
+                "ORDER BY name",
+                [self.table],
+            )
+            return [
+                (name, sql)
+                for name, sql in cursor.fetchall()
+                if not sql.upper().startswith("CREATE UNIQUE")
+            ]
+
+
+VENDORS = {cls.vendor: cls for cls in (PostgreSQLIndexes, SQLiteIndexes)}
+
+
+def get_target_indexes(model):
+    vendor = connections[router.db_for_write(model)].vendor
+    if vendor not in VENDORS:
+        raise ScribeException("Deferred indexes are not available for %s." % vendor)
+    return VENDORS[vendor](model)
+
+
+def get_target_models(store):
+    models = []
+    if store.source.target is not None:
+        models.append(store.source.target.model_class())
+    for target in store.source.target_set.all():
+        models.append(target.content_type.model_class())
+    return models
+
+
+def should_defer(store, model):
+    if not model._base_manager.exists():
+        return True
+    rows = get_defer_rows()
+    if rows is None:
+        return False
+    estimated = estimate_rows(store)
+    return estimated is not None and estimated >= rows
+
+
+def drop_indexes(store):
+    """Drop the deferrable indexes of the targets and save their DDL."""
+    deferred = []
+    for model in get_target_models(store):
+        if not should_defer(store, model):
+            continue
+        target = get_target_indexes(model)
+        indexes = target.get_indexes()
+        if indexes:
+            deferred.append((model._meta.label, indexes))
+    if not deferred:
+        return
+    store.deferred_indexes = [
+        [label, name, ddl] for label, indexes in deferred for name, ddl in indexes
+    ]
+    store.save(update_fields=["deferred_indexes"])
+    for label, indexes in deferred:
+        get_target_indexes(apps.get_model(label)).drop(indexes)
+
+
+def create_indexes(store):
+    """Recreate the indexes saved in ``store.deferred_indexes``."""
+    by_label = {}
+    for label, name, ddl in store.deferred_indexes:
+        by_label.setdefault(label, []).append((name, ddl))
+    for label, indexes in by_label.items():
+        get_target_indexes(apps.get_model(label)).create(indexes)
+    store.deferred_indexes = []
+    store.save(update_fields=["deferred_indexes"])
@@ -0,0 +1,92 @@
+"""Write lineage to its own database.
+
+When a router sends ScribeRow to another database than the targets, a load
+can't be a single transaction. Each chunk is then committed to the target
+databases first, and the lineage buffered meanwhile is flushed in bulk to
+the lineage database right after, together with ``ScribeStore.checkpoint``,
+the last ``object_index`` whose target writes and lineage are both
+committed (``ScribePart.checkpoint`` for a part of a manifest). A store left
+LOADING was interrupted, and target writes of rows after its checkpoint may
+have no lineage.
+"""
+
+from contextlib import ExitStack, contextmanager
+
+from django.db import router, transaction
+
+from .models import ScribeRow
+
+
+@contextmanager
+def atomic(databases):
+    with ExitStack() as stack:
+        for using in sorted(databases):
+            stack.enter_context(transaction.atomic(using=using))
+        yield
+
+
+class LineageWriter:
+    """Write bookkeeping rows of ``store`` along with its target writes."""
+
+    def __init__(self, store):
+        self.store = store
+        self.using = router.db_for_write(ScribeRow)
+        self.target_databases = {
+            router.db_for_write(loader.model) for loader in store.loaders
+        }
+        self.separate = self.target_databases != {self.using}
+        self.deferred = False
+        self.pending = []
+
+    @property
+    def databases(self):
+        return self.target_databases | {self.using}
+
+    def write(self, model, objs, **kwargs):
+        """``bulk_create`` now, or when the current chunk is committed."""
+        objs = list(objs)
+        if self.deferred:
+            self.pending.append((model, objs, kwargs))
+        else:
+            model._default_manager.bulk_create(objs, **kwargs)
+
+    @contextmanager
+    def load(self):
+        """Run a whole load, in one transaction if the databases are shared."""
+        if self.separate:
+            yield
+            return
+        with transaction.atomic(using=self.using):
+            for loader in self.store.loaders:
+                loader.prepare()
+            yield
+
+    @contextmanager
+    def chunk(self, checkpoint=None):
+        """Commit a chunk of target writes, then flush its lineage."""
+        if not self.separate:
+            yield
+            return
+        self.deferred = True
+        try:
+            with atomic(self.target_databases):
+                for loader in self.store.loaders:
+                    loader.prepare()
+                yield
+        except BaseException:
+            self.pending = []
+            raise
+        finally:
+            self.deferred = False
+        self.flush(checkpoint)
+
+    def flush(self, checkpoint=None):
+        with self.store.phases.time("lineage"):
+            with transaction.atomic(using=self.using):
+                for model, objs, kwargs in self.pending:
+                    model._default_manager.bulk_create(objs, **kwargs)
+                if checkpoint is not None:
+                    marker = self.store.part or self.store
+                    marker.checkpoint = checkpoint
+                    marker.save(update_fields=["checkpoint"])
+        self.pending = []
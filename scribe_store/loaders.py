@@ -0,0 +1,237 @@
+import json
+
+from django.db import IntegrityError, router, transaction
+
+from . import RowStatus
+from .exceptions import ScribeException
+from .models import ScribeRow
+from .plans import get_load_plan
+from .resolvers import ForeignKeyResolver
+from .validation import RowValidator, format_error
+
+
+class TargetLoader:
+    """Load chunks of parsed rows into one target model.
+
+    A row is handed to the manager's ``scribe_batch`` (a list of dicts per
+    chunk) or ``scribe_dict`` (one dict per row) if defined. Otherwise it is
+    created by the native backend or ``objects.create``, or upserted by
+    ``key`` with only the changed fields written.
+    """
+
+    def __init__(self, store, model, columns=None, foreign_keys=None, key=None):
+        self.store = store
+        self.model = model
+        self.manager = model._default_manager
+        self.using = router.db_for_write(model)
+        self.plan = get_load_plan(store, model, columns)
+        self.content_type = self.plan.content_type
+        self.row_fields = self.plan.row_fields
+        self.resolver = None
+        if foreign_keys:
+            self.resolver = ForeignKeyResolver(model, foreign_keys)
+        self.validator = None
+        if store.source.validate:
+            self.validator = RowValidator(model)
+        self.fingerprints = None
+        if store.source.idempotent:
+            from .fingerprints import FingerprintIndex
+
+            self.fingerprints = FingerprintIndex(store, self.content_type, key)
+        self.backend = None
+        if store.source.backend == store.source.Backend.NATIVE and not self.has_hook:
+            from .backends import get_backend
+
+            self.backend = get_backend(store, model)
+        self.upsert = None
+        if key and store.source.backend == store.source.Backend.NATIVE:
+            raise ScribeException(
+                "Native backend can't upsert by key. Use ORM or Sorted merge."
+            )
+        if key and store.source.backend == store.source.Backend.ORM:
+            if not self.has_hook:
+                from .upsert import KeyedUpsert
+
+                self.upsert = KeyedUpsert(model, key)
+
+    @property
+    def has_hook(self):
+        return self.plan.hook is not None
+
+    def prepare(self):
+        if self.backend:
+            self.backend.prepare()
+
+    def lineage(self, object_index, data, status, obj=None, message="", object_id=None):
+        return ScribeRow(
+            store=self.store,
+            object_index=object_index,
+            data=json.dumps(data),
+            status=status,
+            content_type=self.content_type,
+            object_id=object_id if obj is None else obj.pk,
+            message=message,
+        )
+
+    def load_chunk(self, rows):
+        """Load ``(object_index, row)`` pairs of stripped, non-empty rows."""
+        phases = self.store.phases
+        with phases.time("convert"):
+            items, errors = self.convert(rows)
+            if self.upsert:
+                items, upsert_errors = self.upsert.convert(items)
+                errors += upsert_errors
+        lineage = [
+            self.lineage(object_index, original, RowStatus.ERROR, message=message)
+            for object_index, original, message in errors
+        ]
+        if self.fingerprints:
+            with phases.time("fingerprint"):
+                items, applied = self.fingerprints.split(items)
+            lineage += [
+                self.lineage(
+                    object_index,
+                    original,
+                    RowStatus.IGNORED,
+                    message="Already applied.",
+                    object_id=object_id,
+                )
+                for object_index, original, object_id in applied
+            ]
+        if self.backend:
+            created = []
+            results = self.write_or_split(self.backend.load_chunk, items)
+            for (object_index, _, original), pk in zip(items, results):
+                if isinstance(pk, IntegrityError):
+                    lineage.append(self.integrity_error(object_index, original, pk))
+                else:
+                    created.append((original, pk, RowStatus.CREATED))
+            with phases.time("lineage"):
+                self.store.lineage_writer.write(ScribeRow, lineage)
+            self.store.count_statuses(row.status for row in lineage)
+            self.store.count_statuses({RowStatus.CREATED: len(created)})
+            if self.fingerprints:
+                with phases.time("fingerprint"):
+                    self.fingerprints.add(created)
+            return
+        results = self.write_or_split(self.write, items)
+        applied = []
+        for (object_index, _, original), result in zip(items, results):
+            if isinstance(result, IntegrityError):
+                lineage.append(self.integrity_error(object_index, original, result))
+                continue
+            obj, status = self.get_result(result)
+            lineage.append(self.lineage(object_index, original, status, obj))
+            applied.append((original, None if obj is None else obj.pk, status))
+        with phases.time("lineage"):
+            self.store.lineage_writer.write(ScribeRow, lineage)
+        if self.fingerprints:
+            with phases.time("fingerprint"):
+                self.fingerprints.add(applied)
+        self.store.count_statuses(row.status for row in lineage)
+
+    def write_or_split(self, write, items):
+        """Return ``write(items)``, the results of each item.
+
+        With ``validate``, unique checks and constraints are left to the
+        database: a chunk failing with an IntegrityError is rolled back to a
+        savepoint and written again row by row, the error being the result of
+        each failing row.
+        """
+        if not self.validator:
+            return write(items)
+        try:
+            with transaction.atomic(using=self.using):
+                return write(items)
+        except IntegrityError:
+            pass
+        results = []
+        for item in items:
+            try:
+                with transaction.atomic(using=self.using):
+                    results += write([item])
+            except IntegrityError as error:
+                results.append(error)
+        return results
+
+    def integrity_error(self, object_index, original, error):
+        return self.lineage(
+            object_index, original, RowStatus.ERROR, message=format_error(error)
+        )
+
+    def write(self, items):
+        """Write ``(object_index, data, original)`` items with the ORM or hooks."""
+        phases = self.store.phases
+        if self.plan.hook == "scribe_batch":
+            with phases.time("hook"):
+                results = self.manager.scribe_batch([data for _, data, _ in items])
+            if len(results) != len(items):
+                raise ScribeException(
+                    "scribe_batch should return a result for each data."
+                )
+        elif self.plan.hook == "scribe_dict":
+            with phases.time("hook"):
+                results = [self.manager.scribe_dict(data) for _, data, _ in items]
+        elif self.upsert:
+            with phases.time("write"):
+                results = self.upsert.write([data for _, data, _ in items])
+        else:
+            with phases.time("write"):
+                results = [self.manager.create(**data) for _, data, _ in items]
+        return results
+
+    def convert(self, rows):
+        """Return ``(object_index, data, original)`` items and error tuples."""
+        items, errors = [], []
+        row_data = self.plan.row_data
+        header_length = self.plan.header_length
+        for object_index, row in rows:
+            data = row_data(row)
+            if data is None:
+                continue
+            if self.validator and len(row) != header_length:
+                message = "Expected %s columns, got %s." % (header_length, len(row))
+                errors.append((object_index, data, message))
+                continue
+            items.append((object_index, data, data))
+        if self.resolver:
+            results = self.resolver.resolve([data for _, data, _ in items])
+            resolved = []
+            for (object_index, _, original), (data, error) in zip(items, results):
+                if error:
+                    errors.append((object_index, original, error))
+                else:
+                    resolved.append((object_index, data, original))
+            items = resolved
+        if self.validator:
+            results = self.validator.validate([data for _, data, _ in items])
+            valid = []
+            for item, error in zip(items, results):
+                if error:
+                    errors.append((item[0], item[2], error))
+                else:
+                    valid.append(item)
+            items = valid
+        return items, errors
+
+    def get_result(self, res):
+        if res is None:
+            return None, RowStatus.IGNORED
+        if isinstance(res, self.model):
+            return res, RowStatus.CREATED
+        if type(res) is tuple:
+            if len(res) != 2:
+                raise ScribeException(
+                    "scribe_dict should return: None, object or 2 length tuple."
+                )
+            ins, status = res
+            if not isinstance(ins, self.model):
+                raise ScribeException("%s should be instance of %s" % (ins, self.model))
+            if not status in RowStatus.values:
+                raise ScribeException(
+                    "status should be RowStatus values. One of %s." % RowStatus.values
+                )
+            return ins, status
+        raise ScribeException(
+            "scribe_dict should return: None, object or 2 length tuple."
+        )
@@ -2,6 +2,8 @@ import djclick as click
 
 from scribe_store import RowStatus
 from scribe_store.models import ScribeSource
+from scribe_store.preview import format_report
+from scribe_store.profiling import profiled
 
 
 def validate_use_downloaded(ctx, param, value):
@@ -27,9 +29,46 @@ def validate_slug(ctx, param, value):
     help="Use already downloaded data(latest). You can specify slug with --downloaded-slug.",
 )
 @click.option("--downloaded-slug", callback=validate_slug, help="Slug of OuterData.")
-def command(scribe_source_slug, download_only, use_downloaded, downloaded_slug):
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Load in a rolled-back savepoint and show expected counts and costs.",
+)
+@click.option("--sample", type=int, help="Dry-run with N rows at random offsets.")
+@click.option("--seed", type=int, help="Random seed of --sample.")
+@click.option(
+    "--pipelined",
+    is_flag=True,
+    default=False,
+    help="Load rows while the file is downloaded.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=None,
+    help="Save cProfile, tracemalloc and SQL query log of the run to the store.",
+)
+def command(
+    scribe_source_slug,
+    download_only,
+    use_downloaded,
+    downloaded_slug,
+    dry_run,
+    sample,
+    seed,
+    pipelined,
+    profile,
+):
     """Download outer data and save to target."""
     source = ScribeSource.objects.get(slug=scribe_source_slug)
+    if dry_run and not use_downloaded:
+        for line in format_report(source.scribe(True, sample, seed)):
+            click.echo(line)
+        return
+    if not (use_downloaded or download_only):
+        source.scribe(pipelined=pipelined, profile=profile or None)
+        return
     if not use_downloaded:
         source.fetch()
     if download_only:
@@ -40,4 +79,9 @@ def command(scribe_source_slug, download_only, use_downloaded, downloaded_slug):
         store = source.store_set.latest("downloaded_at")
     if store.status == store.Status.COMPLETED:
         raise click.ClickException("Already loaded.")
-    store.load_file()
+    if dry_run:
+        for line in format_report(store.preview(sample, seed)):
+            click.echo(line)
+        return
+    with profiled(store, profile or None):
+        store.load_file()
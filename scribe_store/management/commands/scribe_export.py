@@ -0,0 +1,31 @@
+import djclick as click
+from django.apps import apps
+
+from scribe_store import RowStatus
+from scribe_store.models import ScribeStore
+
+STATUSES = {
+    "related": None,
+    "created": RowStatus.CREATED,
+    "updated": RowStatus.UPDATED,
+}
+
+
+@click.command()
+@click.argument("scribe_store_slug")
+@click.option(
+    "--status",
+    type=click.Choice(list(STATUSES)),
+    default="related",
+    help="Export related, created or updated objects.",
+)
+@click.option("--model", help="Target model as app_label.model_name.")
+@click.option("--output", "-o", type=click.File("w"), default="-")
+@click.option("--chunk-size", type=int, help="Rows read at once.")
+def command(scribe_store_slug, status, model, output, chunk_size):
+    """Export the objects of a store next to their lineage as CSV."""
+    store = ScribeStore.objects.get(slug=scribe_store_slug)
+    if model:
+        model = apps.get_model(model)
+    for line in store.iter_csv(model, STATUSES[status], chunk_size):
+        output.write(line)
@@ -1,8 +1,10 @@
 import djclick as click
 from django.contrib.contenttypes.models import ContentType
+from django.db import router, transaction
 
 from scribe_store import RowStatus
 from scribe_store.models import ScribeSource
+from scribe_store.preview import format_report
 
 
 @click.command()
@@ -13,17 +15,35 @@ from scribe_store.models import ScribeSource
 @click.option(
     "--entry-only", is_flag=True, default=False, help="Only create ScribeSource."
 )
-def command(scribe_source_slug, url, target_model, app_label, entry_only):
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Show expected counts and costs without creating anything.",
+)
+@click.option("--sample", type=int, help="Dry-run with N rows at random offsets.")
+@click.option("--seed", type=int, help="Random seed of --sample.")
+def command(
+    scribe_source_slug, url, target_model, app_label, entry_only, dry_run, sample, seed
+):
     """
     Create new source SCRIBE_SOURCE_SLUG and downloaded data from URL and load data to TARGET_MODEL.
     You can specify TARGET_MODEL by lowercase model name.
     It's using django ContentType.
     If model name conflicts with other app, use --app-label option.
     """
-    data_source = ScribeSource.objects.create(
-        slug=scribe_source_slug,
-        url=url,
-        target=ContentType.objects.get(model=target_model),
-    )
-    if not entry_only:
+    using = router.db_for_write(ScribeSource)
+    with transaction.atomic(using=using):
+        data_source = ScribeSource.objects.create(
+            slug=scribe_source_slug,
+            url=url,
+            target=ContentType.objects.get(model=target_model),
+        )
+        if dry_run:
+            report = data_source.scribe(True, sample, seed)
+            transaction.set_rollback(True, using=using)
+    if dry_run:
+        for line in format_report(report):
+            click.echo(line)
+    elif not entry_only:
         data_source.scribe()
@@ -0,0 +1,34 @@
+import djclick as click
+from django.db.models import Q
+
+from scribe_store.models import ScribeSource
+
+
+@click.command()
+@click.argument("scribe_source_slugs", nargs=-1)
+@click.option(
+    "--batch-size", type=int, help="Rows deleted at once. Defaults to chunk size."
+)
+@click.option(
+    "--pause", type=float, default=0.1, help="Seconds to sleep between batches."
+)
+@click.option(
+    "--dry-run", is_flag=True, default=False, help="Only show expired stores."
+)
+def command(scribe_source_slugs, batch_size, pause, dry_run):
+    """
+    Prune stores out of the retention policy of SCRIBE_SOURCE_SLUGS.
+    All sources with keep_stores or keep_days are pruned by default.
+    """
+    sources = ScribeSource.objects.filter(
+        Q(keep_stores__isnull=False) | Q(keep_days__isnull=False)
+    )
+    if scribe_source_slugs:
+        sources = sources.filter(slug__in=scribe_source_slugs)
+    for source in sources:
+        if dry_run:
+            stores = source.expired_stores()
+        else:
+            stores = source.prune(batch_size, pause)
+        for store in stores:
+            click.echo("%s: %s" % (source.slug, store.slug))
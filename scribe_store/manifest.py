@@ -0,0 +1,214 @@
+"""Sources published as a manifest of CSV part files.
+
+A manifest is a text file with the URL of a part on each line. Relative URLs
+are resolved against the manifest URL, and empty lines and lines starting
+with ``#`` are skipped. Every part has the same header.
+
+Parts are downloaded concurrently by a bounded pool of threads, which also
+count the rows of each part. The ``object_index`` of a row is the number of
+rows of the previous parts plus its index in its part, so it doesn't depend
+on the order the parts are downloaded or loaded in.
+
+Each part is loaded by its own store instance, in its own transaction (or
+per-chunk transactions when the lineage is on a separate database), and
+marks its ScribePart COMPLETED with its counts. Parts are loaded by a bounded
+pool of threads, each with its own database connections. The store is
+completed when every part is, and loading it again only loads the parts
+which are not COMPLETED, an interrupted part resuming after its checkpoint.
+
+Parts are loaded one by one when a database is SQLite (one writer at a
+time), for keyed sources (parts could race on the same key) and for the
+sorted merge backend, which merges the whole file at once.
+"""
+
+import csv
+import io
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from urllib.parse import urljoin
+
+import requests
+from django.conf import settings
+from django.core.files import File
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .exceptions import BadHttpStatusException, ScribeException
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def get_manifest_workers():
+    return getattr(settings, "SCRIBE_STORE_MANIFEST_WORKERS", 4)
+
+
+def get_load_workers():
+    return getattr(settings, "SCRIBE_STORE_MANIFEST_LOAD_WORKERS", 4)
+
+
+def parse_manifest(text, base_url):
+    """Return the URLs of the parts listed in a manifest."""
+    urls = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            urls.append(urljoin(base_url, line))
+    if not urls:
+        raise ScribeException("The manifest lists no part.")
+    return urls
+
+
+def download_part(url):
+    """Download a part to a temporary file. Return it, its size and row count."""
+    tmp = tempfile.TemporaryFile()
+    try:
+        with requests.get(url, stream=True) as response:
+            if response.status_code != 200:
+                raise BadHttpStatusException(
+                    "status code: %s (%s)" % (response.status_code, url)
+                )
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                tmp.write(chunk)
+        size = tmp.tell()
+        tmp.seek(0)
+        text = io.TextIOWrapper(tmp, newline="")
+        row_count = max(sum(1 for _ in csv.reader(text)) - 1, 0)
+        text.detach()
+        tmp.seek(0)
+    except BaseException:
+        tmp.close()
+        raise
+    return tmp, size, row_count
+
+
+def fetch_parts(store, text, workers=None):
+    """Download the parts of the manifest ``text`` of ``store``.
+
+    Part files are saved to storage and unsaved ScribeParts are returned.
+    """
+    from .models import ScribePart
+
+    store.ensure_slug()
+    urls = parse_manifest(text, store.url)
+    parts = []
+    offset = 0
+    with ThreadPoolExecutor(max_workers=workers or get_manifest_workers()) as pool:
+        downloads = [pool.submit(download_part, url) for url in urls]
+        try:
+            for index, (url, download) in enumerate(zip(urls, downloads)):
+                tmp, size, row_count = download.result()
+                part = ScribePart(
+                    index=index,
+                    url=url,
+                    size=size,
+                    row_count=row_count,
+                    offset=offset,
+                )
+                with tmp:
+                    part.file.save(
+                        "%s/%s-%s" % (store.source.slug, store.slug, index),
+                        File(tmp),
+                        save=False,
+                    )
+                parts.append(part)
+                offset += row_count
+        except BaseException:
+            for download in downloads:
+                download.cancel()
+            for part in parts:
+                part.file.delete(save=False)
+            raise
+    return parts
+
+
+def part_rows(store, part):
+    """Yield ``(object_index, row)`` of ``part``."""
+    with part.file.open("r") as csvfile:
+        reader = csv.reader(csvfile)
+        if next(reader, None) != store.header:
+            raise ScribeException("Part %s has another header." % part.index)
+        for i, row in enumerate(reader, 1):
+            yield part.offset + i, row
+
+
+def iter_part_rows(store):
+    """Yield ``(object_index, row)`` of every part of ``store`` in order."""
+    for part in store.part_set.order_by("index"):
+        yield from part_rows(store, part)
+
+
+def load_part(store, part):
+    """Load ``part`` with a new instance of ``store``. Return the instance."""
+    from .models import ScribeStore
+
+    worker = ScribeStore.objects.get(pk=store.pk)
+    worker.part = part
+    worker.header = store.header
+    worker.row_count = 0
+    resumed = part.status == ScribeStore.Status.LOADING and part.checkpoint is not None
+    if not resumed:
+        part.status = ScribeStore.Status.LOADING
+        part.checkpoint = None
+        part.save(update_fields=["status", "checkpoint"])
+    writer = worker.lineage_writer
+    # With shared databases, the part is marked COMPLETED in its transaction.
+    atomic = nullcontext() if writer.separate else transaction.atomic(writer.using)
+    with atomic:
+        worker.load_rows(part_rows(worker, part))
+        part.status = ScribeStore.Status.COMPLETED
+        part.completed_at = timezone.now()
+        counts = worker.status_counts
+        if resumed:
+            counts = worker.count_rows(
+                worker.row_set.filter(
+                    object_index__gt=part.offset,
+                    object_index__lte=part.offset + part.row_count,
+                )
+            )
+        part.counts = dict(counts)
+        part.save(update_fields=["status", "completed_at", "counts"])
+    return worker
+
+
+def load_part_in_thread(store, part):
+    try:
+        return load_part(store, part)
+    finally:
+        connections.close_all()
+
+
+def can_load_parallel(store):
+    source = store.source
+    if source.key or source.backend == source.Backend.MERGE:
+        return False
+    return all(
+        connections[using].vendor != "sqlite"
+        for using in store.lineage_writer.databases
+    )
+
+
+def load_parts(store):
+    """Load the parts of ``store`` which are not COMPLETED."""
+    parts = list(store.part_set.order_by("index"))
+    if store.source.backend == store.source.Backend.MERGE:
+        store.load_rows(iter_part_rows(store))
+        store.part_set.update(
+            status=store.Status.COMPLETED, completed_at=timezone.now()
+        )
+        return
+    pending = [part for part in parts if part.status != store.Status.COMPLETED]
+    workers = get_load_workers()
+    if workers > 1 and len(pending) > 1 and can_load_parallel(store):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            loaded = list(pool.map(partial(load_part_in_thread, store), pending))
+    else:
+        loaded = [load_part(store, part) for part in pending]
+    for worker in loaded:
+        store.phases.add(worker.phases)
+    store.status_counts = Counter()
+    for part in parts:
+        store.count_statuses(part.counts)
+    store.row_count = sum(part.row_count or 0 for part in parts)
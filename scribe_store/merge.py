@@ -0,0 +1,274 @@
+"""Sorted merge-join upsert of a keyed source.
+
+The file is sorted by the key column into on-disk runs of bounded size, the
+target table is read ordered by the same key with a server-side cursor, and
+the two sorted streams are merged. Each row is classified as created,
+updated or unchanged (IGNORED), and objects missing from the file can be
+deleted. Reconciling the whole table is one sequential scan on each side.
+"""
+
+import csv
+import heapq
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections, models, router
+from django.db.models.functions import Collate
+
+from . import RowStatus
+from .exceptions import ScribeException
+from .models import ScribeRow
+from .upsert import Changes, get_key_field, to_python
+from .utils import chunked, get_chunk_size
+from .validation import format_error
+
+
+def get_run_size():
+    return getattr(settings, "SCRIBE_STORE_SORT_RUN_SIZE", 100000)
+
+
+class SortedRuns:
+    """External sort of ``(key, object_index, row)`` by key."""
+
+    def __init__(self, run_size=None):
+        self.run_size = run_size or get_run_size()
+        self.runs = []
+
+    @staticmethod
+    def sort_key(item):
+        # Rows without a key come first.
+        return item[0] is not None, item[0], item[1]
+
+    def add_run(self, items):
+        items.sort(key=self.sort_key)
+        run = tempfile.TemporaryFile("w+", newline="")
+        writer = csv.writer(run)
+        for _, object_index, row in items:
+            writer.writerow([object_index] + row)
+        run.seek(0)
+        self.runs.append(run)
+
+    def sort(self, items):
+        for chunk in chunked(items, self.run_size):
+            self.add_run(chunk)
+
+    def read_run(self, run, get_key):
+        for object_index, *row in csv.reader(run):
+            yield get_key(row), int(object_index), row
+
+    def merge(self, get_key):
+        runs = [self.read_run(run, get_key) for run in self.runs]
+        return heapq.merge(*runs, key=self.sort_key)
+
+    def close(self):
+        for run in self.runs:
+            run.close()
+
+
+class MergeLoader:
+    """Upsert a keyed source into its target by a sorted merge-join."""
+
+    def __init__(self, store):
+        if len(store.loaders) != 1:
+            raise ScribeException("Merge backend supports a single target.")
+        self.store = store
+        self.source = store.source
+        self.loader = store.loaders[0]
+        self.model = self.loader.model
+        self.manager = self.model._default_manager
+        self.key_field = get_key_field(self.model, self.source.key)
+        if self.source.key not in self.loader.row_fields:
+            raise ScribeException("Key column %s is not in the file." % self.source.key)
+        self.key_index = self.loader.row_fields.index(self.source.key)
+        self.changes = Changes(self.model)
+        self.chunk_size = get_chunk_size()
+
+    def get_key(self, row):
+        value = row[self.key_index] if self.key_index < len(row) else ""
+        if value == "":
+            return None
+        try:
+            return to_python(self.key_field, value)
+        except ValidationError:
+            return None
+
+    def file_items(self, rows):
+        """Yield ``(key, object_index, row)`` of non-empty rows."""
+        plan = self.loader.plan
+        for object_index, row in rows:
+            self.store.row_count += 1
+            row = plan.clean_row(row)
+            if row is not None and plan.row_data(row) is not None:
+                yield self.get_key(row), object_index, row
+
+    def objects(self):
+        """Yield ``(key, obj)`` of the target ordered by key."""
+        key = self.key_field.name
+        connection = connections[router.db_for_read(self.model)]
+        queryset = self.manager.filter(**{"%s__isnull" % key: False})
+        if connection.vendor == "postgresql":
+            if isinstance(self.key_field, (models.CharField, models.TextField)):
+                # Byte order, the same as the order of Python strings.
+                queryset = queryset.order_by(Collate(key, "C"))
+            else:
+                queryset = queryset.order_by(key)
+            objs = queryset.iterator(chunk_size=self.chunk_size)
+        else:
+            objs = self.snapshot(queryset.order_by(key))
+        last = None
+        for obj in objs:
+            value = getattr(obj, self.key_field.attname)
+            if last is not None and value < last:
+                raise ScribeException("%s is not ordered as expected." % key)
+            last = value
+            yield value, obj
+
+    def snapshot(self, queryset):
+        """Yield objects of ``queryset`` by primary keys read beforehand.
+
+        Only PostgreSQL isolates a cursor from the writes of the merge, so
+        the ordered primary keys are spooled to disk first elsewhere.
+        """
+        pk = self.model._meta.pk
+        with tempfile.TemporaryFile("w+", newline="") as fp:
+            writer = csv.writer(fp)
+            for value in queryset.values_list("pk", flat=True).iterator(
+                chunk_size=self.chunk_size
+            ):
+                writer.writerow([value])
+            fp.seek(0)
+            pks = (pk.to_python(value) for (value,) in csv.reader(fp))
+            for chunk in chunked(pks, self.chunk_size):
+                objs = self.manager.in_bulk(chunk)
+                for value in chunk:
+                    if value in objs:
+                        yield objs[value]
+
+    def merge(self, items):
+        """Yield ``(object_index, row, obj, error)`` and ``(None, None, obj, None)``.
+
+        ``obj`` is the existing object of the key, and a missing object is
+        yielded without a row.
+        """
+        objects = self.objects()
+        current = next(objects, None)
+        last = None
+        for key, object_index, row in items:
+            if key is None:
+                yield object_index, row, None, "Missing %s." % self.source.key
+                continue
+            if key == last:
+                yield object_index, row, None, "Duplicate %s %r." % (
+                    self.source.key,
+                    key,
+                )
+                continue
+            last = key
+            while current is not None and current[0] < key:
+                yield None, None, current[1], None
+                current = next(objects, None)
+            if current is not None and current[0] == key:
+                yield object_index, row, current[1], None
+                current = next(objects, None)
+            else:
+                yield object_index, row, None, None
+        while current is not None:
+            yield None, None, current[1], None
+            current = next(objects, None)
+
+    def load(self, rows):
+        phases = self.store.phases
+        runs = SortedRuns()
+        try:
+            with phases.time("sort"):
+                runs.sort(self.file_items(rows))
+                merged = self.merge(runs.merge(self.get_key))
+            batch, missing = [], []
+            while True:
+                with phases.time("merge"):
+                    event = next(merged, None)
+                if event is None:
+                    break
+                if event[0] is None:
+                    missing.append(event[2])
+                else:
+                    batch.append(event)
+                if len(batch) >= self.chunk_size or len(missing) >= self.chunk_size:
+                    with self.store.lineage_writer.chunk():
+                        self.load_batch(batch, missing)
+                    batch, missing = [], []
+            with self.store.lineage_writer.chunk():
+                self.load_batch(batch, missing)
+        finally:
+            runs.close()
+
+    def load_batch(self, batch, missing):
+        phases = self.store.phases
+        lineage = []
+        with phases.time("convert"):
+            existing = {}
+            rows = []
+            for object_index, row, obj, error in batch:
+                if error:
+                    data = self.loader.plan.row_data(row)
+                    lineage.append(
+                        self.loader.lineage(
+                            object_index, data, RowStatus.ERROR, message=error
+                        )
+                    )
+                    continue
+                existing[object_index] = obj
+                rows.append((object_index, row))
+            items, errors = self.loader.convert(rows)
+            for object_index, original, message in errors:
+                lineage.append(
+                    self.loader.lineage(
+                        object_index, original, RowStatus.ERROR, message=message
+                    )
+                )
+            creates, updates, ignored = [], {}, []
+            for object_index, data, original in items:
+                try:
+                    values = self.changes.convert(data)
+                except ValidationError as error:
+                    lineage.append(
+                        self.loader.lineage(
+                            object_index,
+                            original,
+                            RowStatus.ERROR,
+                            message=format_error(error),
+                        )
+                    )
+                    continue
+                obj = existing[object_index]
+                if obj is None:
+                    creates.append((object_index, original, self.model(**values)))
+                    continue
+                changed = self.changes.apply(obj, values)
+                if changed:
+                    updates.setdefault(tuple(sorted(changed)), []).append(
+                        (object_index, original, obj)
+                    )
+                else:
+                    ignored.append((object_index, original, obj))
+        with phases.time("write"):
+            self.manager.bulk_create([obj for _, _, obj in creates])
+            for fields, group in updates.items():
+                self.manager.bulk_update([obj for _, _, obj in group], fields)
+            if missing and self.source.delete_missing:
+                self.manager.filter(pk__in=[obj.pk for obj in missing]).delete()
+        results = [(RowStatus.CREATED, creates), (RowStatus.IGNORED, ignored)]
+        results += [(RowStatus.UPDATED, group) for group in updates.values()]
+        for status, group in results:
+            for object_index, original, obj in group:
+                lineage.append(self.loader.lineage(object_index, original, status, obj))
+        if self.source.delete_missing:
+            key = self.key_field
+            for obj in missing:
+                data = {key.name: str(getattr(obj, key.attname))}
+                lineage.append(self.loader.lineage(0, data, RowStatus.DELETED, obj))
+        lineage.sort(key=lambda row: row.object_index)
+        with phases.time("lineage"):
+            self.store.lineage_writer.write(ScribeRow, lineage)
+        self.store.count_statuses(row.status for row in lineage)
@@ -0,0 +1,60 @@
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .signals import store_fetched, store_loaded
+
+
+class PhaseTimer:
+    """Accumulate wall time per phase of a fetch or a load."""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+
+    @contextmanager
+    def time(self, phase):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[phase] += perf_counter() - start
+
+    def add(self, other):
+        for phase, seconds in other.seconds.items():
+            self.seconds[phase] += seconds
+
+    def as_dict(self):
+        return {phase: round(seconds, 6) for phase, seconds in self.seconds.items()}
+
+
+def reset_peak_memory():
+    if tracemalloc.is_tracing() and hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+
+
+def peak_memory():
+    """Traced peak in bytes since ``reset_peak_memory``, ``None`` if not tracing.
+
+    The max RSS of the process is a lifetime peak and can't tell one load
+    from the previous ones, so it isn't reported.
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    return None
+
+
+def send_metrics(event, store):
+    """Send ``"fetched"`` or ``"loaded"`` metrics of ``store``.
+
+    ``SCRIBE_STORE_METRICS_HOOK`` is a dotted path to a callable which is
+    called with the event and the store, after the signal.
+    """
+    signal = {"fetched": store_fetched, "loaded": store_loaded}[event]
+    signal.send(sender=store.__class__, store=store)
+    hook = getattr(settings, "SCRIBE_STORE_METRICS_HOOK", None)
+    if hook:
+        import_string(hook)(event, store)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scribesource",
+            name="backend",
+            field=models.CharField(
+                choices=[("O", "ORM"), ("N", "Native")],
+                default="O",
+                help_text="Native uses COPY on PostgreSQL and executemany on SQLite. Targets with scribe_dict always use ORM.",
+                max_length=1,
+            ),
+        ),
+    ]
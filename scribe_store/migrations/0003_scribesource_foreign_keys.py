@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0002_source_backend"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scribesource",
+            name="foreign_keys",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text='Resolve foreign keys by a field of the related model. ex) {"question": "question_text"}',
+            ),
+        ),
+    ]
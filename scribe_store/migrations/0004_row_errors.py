@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0003_scribesource_foreign_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scriberow",
+            name="message",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="scribesource",
+            name="validate",
+            field=models.BooleanField(
+                default=False,
+                help_text="Validate rows before loading. Invalid rows are recorded as errors.",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="scriberow",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("C", "Created"),
+                    ("U", "Updated"),
+                    ("I", "Ignored"),
+                    ("D", "Deleted"),
+                    ("X", "Unknown"),
+                    ("E", "Error"),
+                ],
+                default="X",
+                max_length=1,
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("scribe_store", "0004_row_errors"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScribeTarget",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "columns",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text='Map CSV columns to fields. Empty uses all columns. ex) {"news_text": "question_text"}',
+                    ),
+                ),
+                (
+                    "foreign_keys",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text='Resolve foreign keys by a field of the related model. ex) {"question": "question_text"}',
+                    ),
+                ),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+                (
+                    "source",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="target_set",
+                        to="scribe_store.scribesource",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0005_scribetarget"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scribestore",
+            name="metrics",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Wall time of each phase in seconds.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="scribestore",
+            name="row_count",
+            field=models.PositiveIntegerField(
+                blank=True, help_text="Parsed rows including empty rows.", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="scribestore",
+            name="size",
+            field=models.PositiveBigIntegerField(
+                blank=True, help_text="Downloaded bytes.", null=True
+            ),
+        ),
+    ]
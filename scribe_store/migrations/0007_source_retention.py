@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0006_store_metrics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scribesource",
+            name="keep_days",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Retention: keep stores of the last D days.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="scribesource",
+            name="keep_lineage",
+            field=models.BooleanField(
+                default=False,
+                help_text="Retention: only delete files of expired stores and keep their rows.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="scribesource",
+            name="keep_stores",
+            field=models.PositiveIntegerField(
+                blank=True, help_text="Retention: keep the latest N stores.", null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0007_source_retention"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scribestore",
+            name="archive",
+            field=models.FileField(
+                blank=True,
+                help_text="Compressed ScribeRows of an archived store.",
+                upload_to="scribe-store/archive",
+            ),
+        ),
+        migrations.AddField(
+            model_name="scribestore",
+            name="archived_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
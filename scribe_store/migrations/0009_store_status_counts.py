@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:55
+
+from django.db import migrations, models
+
+COUNT_FIELDS = {
+    "C": "created_count",
+    "U": "updated_count",
+    "I": "ignored_count",
+    "D": "deleted_count",
+    "X": "unknown_count",
+    "E": "error_count",
+}
+
+
+def count_rows(apps, schema_editor):
+    ScribeStore = apps.get_model("scribe_store", "ScribeStore")
+    ScribeRow = apps.get_model("scribe_store", "ScribeRow")
+    counts = {}
+    rows = ScribeRow.objects.values_list("store", "status").annotate(
+        count=models.Count("pk")
+    )
+    for store, status, count in rows.order_by():
+        if status in COUNT_FIELDS:
+            counts.setdefault(store, {})[COUNT_FIELDS[status]] = count
+    for store, fields in counts.items():
+        ScribeStore.objects.filter(pk=store).update(**fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0008_store_archive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scribestore",
+            name="created_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scribestore",
+            name="deleted_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scribestore",
+            name="error_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scribestore",
+            name="ignored_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scribestore",
+            name="unknown_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scribestore",
+            name="updated_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_rows, migrations.RunPython.noop),
+    ]
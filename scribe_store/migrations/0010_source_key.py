@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0009_store_status_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scribesource",
+            name="delete_missing",
+            field=models.BooleanField(
+                default=False,
+                help_text="Sorted merge: delete target objects which are not in the file.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="scribesource",
+            name="key",
+            field=models.CharField(
+                blank=True,
+                help_text="Unique field of the target which identifies a row.",
+                max_length=100,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="scribesource",
+            name="backend",
+            field=models.CharField(
+                choices=[("O", "ORM"), ("N", "Native"), ("M", "Sorted merge")],
+                default="O",
+                help_text="Native uses COPY on PostgreSQL and executemany on SQLite. Targets with scribe_dict always use ORM. Sorted merge upserts the target by key.",
+                max_length=1,
+            ),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("scribe_store", "0010_source_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scribesource",
+            name="idempotent",
+            field=models.BooleanField(
+                default=False,
+                help_text="Skip rows already applied by a store of this source.",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ScribeFingerprint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("digest", models.CharField(max_length=32)),
+                ("object_id", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+                (
+                    "source",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fingerprint_set",
+                        to="scribe_store.scribesource",
+                    ),
+                ),
+                (
+                    "store",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="fingerprint_set",
+                        to="scribe_store.scribestore",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("source", "content_type", "digest"),
+                        name="scribe_store_unique_fingerprint",
+                    )
+                ],
+            },
+        ),
+    ]
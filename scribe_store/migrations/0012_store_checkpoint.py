@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0011_fingerprints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scribestore",
+            name="checkpoint",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Last object_index whose target writes and lineage are committed (lineage on a separate database).",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0012_store_checkpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scribestore",
+            name="profile",
+            field=models.FileField(
+                blank=True,
+                help_text="Zip of cProfile, tracemalloc and SQL query log of a profiled run.",
+                upload_to="scribe-store/profile",
+            ),
+        ),
+    ]
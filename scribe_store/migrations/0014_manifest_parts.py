@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0013_store_profile"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="scribesource",
+            name="data_type",
+            field=models.CharField(
+                choices=[("C", "CSV"), ("M", "Manifest of CSV parts")],
+                default="C",
+                max_length=1,
+            ),
+        ),
+        migrations.CreateModel(
+            name="ScribePart",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "index",
+                    models.PositiveIntegerField(help_text="Order in the manifest."),
+                ),
+                ("url", models.URLField()),
+                ("file", models.FileField(upload_to="scribe-store/part")),
+                (
+                    "size",
+                    models.PositiveBigIntegerField(
+                        blank=True, help_text="Downloaded bytes.", null=True
+                    ),
+                ),
+                (
+                    "row_count",
+                    models.PositiveIntegerField(
+                        blank=True, help_text="Rows without the header.", null=True
+                    ),
+                ),
+                (
+                    "offset",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Rows of the previous parts. Added to object_index.",
+                    ),
+                ),
+                (
+                    "store",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="part_set",
+                        to="scribe_store.scribestore",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("store", "index"), name="scribe_store_unique_part"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0014_manifest_parts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scribesource",
+            name="defer_indexes",
+            field=models.BooleanField(
+                default=False,
+                help_text="Drop non-unique indexes of empty targets during a load and rebuild them afterwards.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="scribestore",
+            name="deferred_indexes",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Target indexes dropped by the load, until they are recreated.",
+            ),
+        ),
+    ]
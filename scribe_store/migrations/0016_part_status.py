@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0015_defer_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scribepart",
+            name="checkpoint",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Last object_index whose target writes and lineage are committed (lineage on a separate database).",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="scribepart",
+            name="completed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="scribepart",
+            name="counts",
+            field=models.JSONField(
+                blank=True, default=dict, help_text="Loaded rows per RowStatus."
+            ),
+        ),
+        migrations.AddField(
+            model_name="scribepart",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("D", "Downloaded"),
+                    ("L", "Loading"),
+                    ("C", "Completed"),
+                    ("X", "Deleted"),
+                ],
+                default="D",
+                max_length=1,
+            ),
+        ),
+    ]
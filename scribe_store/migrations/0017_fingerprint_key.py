@@ -0,0 +1,41 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def set_digest_keys(apps, schema_editor):
+    ScribeFingerprint = apps.get_model("scribe_store", "ScribeFingerprint")
+    ScribeFingerprint.objects.using(schema_editor.connection.alias).update(
+        key=F("digest")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scribe_store", "0016_part_status"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="scribefingerprint",
+            name="scribe_store_unique_fingerprint",
+        ),
+        migrations.AddField(
+            model_name="scribefingerprint",
+            name="key",
+            field=models.CharField(
+                default="",
+                help_text="Key value of the row, or its digest for a source without key.",
+                max_length=255,
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(set_digest_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="scribefingerprint",
+            constraint=models.UniqueConstraint(
+                fields=("source", "content_type", "key"),
+                name="scribe_store_unique_fingerprint_key",
+            ),
+        ),
+    ]
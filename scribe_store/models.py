@@ -1,33 +1,43 @@
 import csv
 import json
 import secrets
+import time
+from collections import Counter
+from datetime import timedelta
 from functools import cached_property
 
 import requests
-from django.conf import settings
+from asgiref.sync import sync_to_async
 from django.contrib import admin
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
-from django.db import models, transaction
+from django.db import close_old_connections, models, router, transaction
+from django.db.models import Count
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.safestring import mark_safe
 
 from . import RowStatus
-
-
-class BadHttpStatusException(Exception):
-    pass
-
-
-class ScribeException(Exception):
-    pass
+from .archive import COLUMNS as ARCHIVE_COLUMNS
+from .archive import iter_archive, read_archive, row_groups, write_archive
+from .exceptions import BadHttpStatusException, ScribeException
+from .indexes import create_indexes, drop_indexes
+from .metrics import PhaseTimer, peak_memory, reset_peak_memory, send_metrics
+from .profiling import profiled
+from .utils import chunked, get_chunk_size
 
 
 class ScribeSource(models.Model):
     class DataType(models.TextChoices):
         CSV = "C", "CSV"
+        MANIFEST = "M", "Manifest of CSV parts"
+
+    class Backend(models.TextChoices):
+        ORM = "O", "ORM"
+        NATIVE = "N", "Native"
+        MERGE = "M", "Sorted merge"
 
     slug = models.SlugField(unique=True)
     data_type = models.CharField(max_length=1, choices=DataType.choices, default="C")
@@ -38,29 +48,160 @@ class ScribeSource(models.Model):
     target = models.ForeignKey(
         ContentType, blank=True, null=True, on_delete=models.SET_NULL
     )
+    backend = models.CharField(
+        max_length=1,
+        choices=Backend.choices,
+        default="O",
+        help_text="Native uses COPY on PostgreSQL and executemany on SQLite. "
+        "Targets with scribe_dict always use ORM. "
+        "Sorted merge upserts the target by key.",
+    )
+    key = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Unique field of the target which identifies a row.",
+    )
+    delete_missing = models.BooleanField(
+        default=False,
+        help_text="Sorted merge: delete target objects which are not in the file.",
+    )
+    idempotent = models.BooleanField(
+        default=False,
+        help_text="Skip rows already applied by a store of this source.",
+    )
+    defer_indexes = models.BooleanField(
+        default=False,
+        help_text="Drop non-unique indexes of empty targets during a load "
+        "and rebuild them afterwards.",
+    )
+    foreign_keys = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Resolve foreign keys by a field of the related model. "
+        'ex) {"question": "question_text"}',
+    )
+    validate = models.BooleanField(
+        default=False,
+        help_text="Validate rows before loading. Invalid rows are recorded as errors.",
+    )
+    keep_stores = models.PositiveIntegerField(
+        blank=True, null=True, help_text="Retention: keep the latest N stores."
+    )
+    keep_days = models.PositiveIntegerField(
+        blank=True, null=True, help_text="Retention: keep stores of the last D days."
+    )
+    keep_lineage = models.BooleanField(
+        default=False,
+        help_text="Retention: only delete files of expired stores and keep their rows.",
+    )
 
     def __str__(self):
         return self.slug
 
+    def clean(self):
+        if self.key and self.backend == self.Backend.NATIVE:
+            raise ValidationError(
+                {"key": "Native backend can't upsert by key. Use ORM or Sorted merge."}
+            )
+        if self.backend == self.Backend.MERGE and not self.key:
+            raise ValidationError({"key": "Sorted merge needs a key."})
+
     @property
     def current_url(self):
         return timezone.localtime().strftime(self.url)
 
-    def fetch(self):
-        data_url = self.current_url
-        response = requests.get(data_url)
+    def fetch(self, store=None):
+        if store is None:
+            store = ScribeStore(source=self, url=self.current_url)
+        with store.phases.time("download"):
+            response = requests.get(store.url)
         if response.status_code != 200:
             raise BadHttpStatusException("status code: %s" % response.status_code)
-        store = ScribeStore(source=self, url=data_url)
-        store.ensure_slug()
-        store.file.save(
-            "%s/%s" % (self.slug, store.slug),
-            ContentFile(response.content),
+        store.size = len(response.content)
+        parts = []
+        if self.data_type == self.DataType.MANIFEST:
+            from .manifest import fetch_parts
+
+            with store.phases.time("parts"):
+                parts = fetch_parts(store, response.text)
+            store.size += sum(part.size for part in parts)
+        store.save_file(ContentFile(response.content), parts)
+        return store
+
+    async def afetch(self, client=None):
+        """Async ``fetch`` with an ``httpx.AsyncClient``."""
+        from .aio import afetch
+
+        return await afetch(self, client)
+
+    def scribe(
+        self, dry_run=False, sample=None, seed=None, pipelined=False, profile=None
+    ):
+        """Fetch and load. With ``dry_run``, return a preview report instead.
+
+        A dry run loads the file, or ``sample`` random rows of it, in a
+        rolled-back savepoint and deletes the fetched store afterwards.
+        With ``pipelined``, rows are loaded while the file is downloaded.
+        With ``profile``, the run is profiled into ``ScribeStore.profile``.
+        ``None`` profiles a sample of runs at ``SCRIBE_STORE_PROFILE_RATE``.
+        """
+        if dry_run:
+            store = self.fetch()
+            try:
+                return store.preview(sample, seed)
+            finally:
+                store.delete_files()
+                store.delete()
+        store = ScribeStore(source=self, url=self.current_url)
+        with profiled(store, profile):
+            if pipelined:
+                from .pipeline import scribe_pipelined
+
+                scribe_pipelined(self, store=store)
+            else:
+                self.fetch(store)
+                store.load_file()
+        return None
+
+    async def ascribe(self, client=None):
+        """Async ``scribe``. The load runs in a worker thread."""
+        store = await self.afetch(client)
+        await store.aload_file()
+
+    def expired_stores(self):
+        """Stores out of the retention policy.
+
+        A store is kept if it is one of the latest ``keep_stores`` COMPLETED
+        stores or is newer than ``keep_days``. Only COMPLETED and DELETED stores
+        expire, so stores being loaded are never touched, and don't count
+        toward ``keep_stores`` either.
+        """
+        if self.keep_stores is None and self.keep_days is None:
+            return self.store_set.none()
+        stores = self.store_set.filter(
+            status__in=[ScribeStore.Status.COMPLETED, ScribeStore.Status.DELETED]
         )
-
-    def scribe(self):
-        self.fetch()
-        self.store_set.latest("downloaded_at").load_file()
+        if self.keep_stores is not None:
+            latest = (
+                self.store_set.filter(status=ScribeStore.Status.COMPLETED)
+                .order_by("-downloaded_at")
+                .values_list("pk", flat=True)[: self.keep_stores]
+            )
+            stores = stores.exclude(pk__in=list(latest))
+        if self.keep_days is not None:
+            since = timezone.now() - timedelta(days=self.keep_days)
+            stores = stores.filter(downloaded_at__lt=since)
+        if self.keep_lineage:
+            stores = stores.exclude(file="")
+        return stores.order_by("downloaded_at")
+
+    def prune(self, batch_size=None, pause=0):
+        """Prune expired stores and return them."""
+        pruned = []
+        for store in self.expired_stores():
+            store.prune(self.keep_lineage, batch_size, pause)
+            pruned.append(store)
+        return pruned
 
 
 class ScribeStore(models.Model):
@@ -79,6 +220,46 @@ class ScribeStore(models.Model):
     status = models.CharField(max_length=1, choices=Status.choices, default="D")
     downloaded_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(blank=True, null=True)
+    size = models.PositiveBigIntegerField(
+        blank=True, null=True, help_text="Downloaded bytes."
+    )
+    row_count = models.PositiveIntegerField(
+        blank=True, null=True, help_text="Parsed rows including empty rows."
+    )
+    checkpoint = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        help_text="Last object_index whose target writes and lineage are committed"
+        " (lineage on a separate database).",
+    )
+    metrics = models.JSONField(
+        default=dict, blank=True, help_text="Wall time of each phase in seconds."
+    )
+    archive = models.FileField(
+        upload_to="scribe-store/archive",
+        blank=True,
+        help_text="Compressed ScribeRows of an archived store.",
+    )
+    archived_at = models.DateTimeField(blank=True, null=True)
+    deferred_indexes = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Target indexes dropped by the load, until they are recreated.",
+    )
+    profile = models.FileField(
+        upload_to="scribe-store/profile",
+        blank=True,
+        help_text="Zip of cProfile, tracemalloc and SQL query log of a profiled run.",
+    )
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    ignored_count = models.PositiveIntegerField(default=0)
+    deleted_count = models.PositiveIntegerField(default=0)
+    unknown_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+
+    # The ScribePart loaded by this instance, see manifest.load_part.
+    part = None
 
     def __str__(self):
         return self.slug
@@ -93,119 +274,508 @@ class ScribeStore(models.Model):
 
     @cached_property
     def ModelClass(self):
+        if self.source.target is None:
+            return self.source.target_set.all()[0].content_type.model_class()
         return self.source.target.model_class()
 
+    @cached_property
+    def phases(self):
+        return PhaseTimer()
+
+    @staticmethod
+    def get_count_field(status):
+        return "%s_count" % RowStatus(status).name.lower()
+
+    def set_status_counts(self, counts):
+        """Set ``<status>_count`` fields from a mapping of RowStatus to count."""
+        for status in RowStatus.values:
+            setattr(self, self.get_count_field(status), counts.get(status, 0))
+
+    def count_statuses(self, statuses):
+        """Add statuses (an iterable or a mapping to counts) of loaded rows."""
+        self.status_counts.update(statuses)
+
+    @cached_property
+    def status_counts(self):
+        return Counter()
+
+    @staticmethod
+    def count_rows(rows):
+        """Return a Counter of the statuses of ``rows``, a ScribeRow queryset."""
+        return Counter(
+            dict(rows.order_by().values_list("status").annotate(Count("pk")))
+        )
+
     @cached_property
     def header(self):
-        with open(self.file.path) as csvfile:
+        path = self.file.path
+        if self.source.data_type == self.source.DataType.MANIFEST:
+            path = self.part_set.order_by("index")[0].file.path
+        with open(path) as csvfile:
             reader = csv.reader(csvfile)
             return next(reader)
 
+    @cached_property
+    def lineage_writer(self):
+        from .lineage import LineageWriter
+
+        return LineageWriter(self)
+
     @cached_property
     def row_fields(self):
-        row_fields = []
-        field_names = {f.name for f in self.ModelClass._meta.fields}
-        verbose_name_to_name = {
-            f.verbose_name: f.name for f in self.ModelClass._meta.fields
-        }
-        for s in self.header:
-            if s in field_names:
-                row_fields.append(s)
-            elif s in verbose_name_to_name:
-                row_fields.append(verbose_name_to_name[s])
-            else:
-                row_fields.append(s)
-        return row_fields
+        return self.loaders[0].row_fields
 
-    def load_file(self):
+    @cached_property
+    def loaders(self):
+        from .loaders import TargetLoader
+
+        loaders = []
+        if self.source.target is not None:
+            loaders.append(
+                TargetLoader(
+                    self,
+                    self.source.target.model_class(),
+                    foreign_keys=self.source.foreign_keys,
+                    key=self.source.key,
+                )
+            )
+        for target in self.source.target_set.all():
+            loaders.append(
+                TargetLoader(
+                    self,
+                    target.content_type.model_class(),
+                    columns=target.columns,
+                    foreign_keys=target.foreign_keys,
+                )
+            )
+        if not loaders:
+            raise ScribeException("%s has no target." % self.source)
+        return loaders
+
+    def save_file(self, content, parts=()):
+        """Save downloaded ``content`` and ``parts`` and record fetch metrics."""
+        self.ensure_slug()
+        with self.phases.time("store"):
+            self.file.save("%s/%s" % (self.source.slug, self.slug), content, save=False)
+        self.metrics["fetch"] = self.phases.as_dict()
+        self.save()
+        for part in parts:
+            part.store = self
+        ScribePart.objects.bulk_create(parts)
+        send_metrics("fetched", self)
+
+    def load_file(self, csvfile=None, defer_indexes=None):
+        """Load the stored file, or ``csvfile`` if given, into the targets.
+
+        With ``defer_indexes`` (``ScribeSource.defer_indexes`` by default),
+        non-unique indexes of empty targets are rebuilt after the load.
+        Loading an interrupted store again resumes after its ``checkpoint``:
+        rows which already have lineage are skipped, and the counts are
+        recomputed from the lineage.
+        """
+        if defer_indexes is None:
+            defer_indexes = self.source.defer_indexes
+        resumed = self.status == self.Status.LOADING and self.checkpoint is not None
         self.status = self.Status.LOADING
+        if not resumed:
+            self.checkpoint = None
         self.save()
-        if self.source.data_type == self.source.DataType.CSV:
-            self.load_csv()
+        self.phases = PhaseTimer()
+        self.status_counts = Counter()
+        self.row_count = 0
+        reset_peak_memory()
+        start = time.perf_counter()
+        if defer_indexes:
+            with self.phases.time("indexes"):
+                drop_indexes(self)
+        try:
+            if self.source.data_type == self.source.DataType.CSV:
+                self.load_csv(csvfile)
+            elif self.source.data_type == self.source.DataType.MANIFEST:
+                self.load_manifest()
+        finally:
+            if self.deferred_indexes:
+                with self.phases.time("indexes"):
+                    create_indexes(self)
+        seconds = time.perf_counter() - start
+        if resumed:
+            self.status_counts = self.count_rows(self.row_set.all())
+        self.metrics["load"] = {
+            **self.phases.as_dict(),
+            "total": round(seconds, 6),
+            "rows_per_sec": round(self.row_count / seconds, 1) if seconds else None,
+            "peak_memory": peak_memory(),
+        }
+        self.set_status_counts(self.status_counts)
         self.status = self.Status.COMPLETED
         self.completed_at = timezone.now()
         self.save()
-
-    def load_csv(self):
-        with open(self.file.path) as csvfile:
-            _ = next(csvfile)
-            reader = csv.reader(csvfile)
-            with transaction.atomic():
-                for i, row in enumerate(reader):
-                    self.load_row(i + 1, row)
+        send_metrics("loaded", self)
+
+    def restore_indexes(self):
+        """Recreate target indexes left dropped by an interrupted load."""
+        if self.deferred_indexes:
+            create_indexes(self)
+
+    def load_file_in_thread(self):
+        try:
+            self.load_file()
+        finally:
+            close_old_connections()
+
+    async def aload_file(self):
+        """``load_file`` in a worker thread, so loads aren't serialized."""
+        await sync_to_async(self.load_file_in_thread, thread_sensitive=False)()
+
+    def load_csv(self, csvfile=None):
+        if csvfile is None:
+            with open(self.file.path) as csvfile:
+                return self.load_csv(csvfile)
+        reader = csv.reader(csvfile)
+        with self.phases.time("parse"):
+            self.header = next(reader)
+        self.load_rows(enumerate(reader, 1))
+
+    def load_manifest(self):
+        from .manifest import load_parts
+
+        load_parts(self)
+
+    def load_rows(self, rows):
+        """Load ``(object_index, row)`` pairs in chunks.
+
+        Rows up to the checkpoint of the store (or of its part) already have
+        lineage and are skipped.
+        """
+        writer = self.lineage_writer
+        checkpoint = (self.part or self).checkpoint or 0
+        with writer.load():
+            if self.source.backend == self.source.Backend.MERGE:
+                from .merge import MergeLoader
+
+                MergeLoader(self).load(rows)
+                return
+            chunks = chunked(rows, get_chunk_size())
+            while True:
+                with self.phases.time("parse"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                self.row_count = (self.row_count or 0) + len(chunk)
+                chunk = [row for row in chunk if row[0] > checkpoint]
+                if not chunk:
+                    continue
+                with writer.chunk(chunk[-1][0]):
+                    self.load_chunk(chunk)
+
+    def clean_row(self, row):
+        return self.loaders[0].plan.clean_row(row)
+
+    def load_chunk(self, chunk):
+        clean_row = self.loaders[0].plan.clean_row
+        rows = []
+        for object_index, row in chunk:
+            row = clean_row(row)
+            if row is not None:
+                rows.append((object_index, row))
+        for loader in self.loaders:
+            loader.load_chunk(rows)
 
     def load_row(self, object_index, row):
-        if getattr(settings, "SCRIBE_STORE_STRIP_VALUE", True):
-            row = [f.strip() for f in row]
-        if not any(row):
-            return
-        data = dict(zip(self.row_fields, row))
-
-        if hasattr(self.ModelClass.objects, "scribe_dict"):
-            res = self.ModelClass.objects.scribe_dict(data)
-            if res is None:
-                ins = None
-                status = RowStatus.IGNORED
-            elif isinstance(res, self.ModelClass):
-                ins = res
-                status = RowStatus.CREATED
-            elif type(res) is tuple:
-                if len(res) != 2:
-                    raise ScribeException(
-                        "scribe_dict should return: None, object or 2 length tuple."
-                    )
-                ins, status = res
-                if not isinstance(ins, self.ModelClass):
-                    raise ScribeException(
-                        "%s should be instance of %s" % (ins, self.ModelClass)
-                    )
-                if not status in RowStatus.values:
-                    raise ScribeException(
-                        "status should be RowStatus values. One of %s."
-                        % (status, RowStatus.values)
-                    )
-        else:
-            ins = self.ModelClass.objects.create(**data)
-            status = RowStatus.CREATED
-        ScribeRow.objects.create(
-            store=self,
-            object_index=object_index,
-            data=json.dumps(data),
-            status=status,
-            target=ins,
-        )
+        self.load_chunk([(object_index, row)])
 
-    def related(self):
-        ids = self.row_set.values("object_id")
-        return self.ModelClass.objects.filter(id__in=ids)
+    def preview(self, sample=None, seed=None):
+        """Dry-run the load and return expected counts and projected costs."""
+        from .preview import preview
 
-    def created(self):
-        ids = self.row_set.filter(status=RowStatus.CREATED).values("object_id")
-        return self.ModelClass.objects.filter(id__in=ids)
+        return preview(self, sample, seed)
 
-    def updated(self):
-        ids = self.row_set.filter(status=RowStatus.UPDATED).values("object_id")
-        return self.ModelClass.objects.filter(id__in=ids)
+    def prune(self, keep_lineage=False, batch_size=None, pause=0):
+        """Delete the file through the storage, then rows and the store itself.
 
-    def deleted(self):
-        ids = self.row_set.filter(status=RowStatus.DELETED).values("object_id")
-        return self.ModelClass.objects.filter(id__in=ids)
+        Rows are deleted in batches of ``batch_size`` with ``pause`` seconds
+        between them, so a huge store doesn't lock the table for long.
+        """
+        if self.file:
+            self.file.delete(save=False)
+            self.save(update_fields=["file"])
+        if keep_lineage:
+            return
+        self.delete_rows(batch_size, pause)
+        self.delete_files()
+        self.delete()
+
+    def delete_files(self):
+        """Delete the file, archive, profile and part files through the storage."""
+        for field in (self.file, self.archive, self.profile):
+            if field:
+                field.delete(save=False)
+        for part in self.part_set.all():
+            part.file.delete(save=False)
+
+    def delete_rows(self, batch_size=None, pause=0):
+        batch_size = batch_size or get_chunk_size()
+        while True:
+            pks = list(self.row_set.values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            ScribeRow.objects.filter(pk__in=pks).delete()
+            if pause:
+                time.sleep(pause)
+
+    @admin.display(description="rows/sec")
+    def get_rows_per_sec(self):
+        return self.metrics.get("load", {}).get("rows_per_sec")
+
+    @admin.display(description="metrics")
+    def get_metrics_formatted(self):
+        return mark_safe("<pre>%s</pre>" % json.dumps(self.metrics, indent=4))
 
-    def unknown(self):
-        ids = self.row_set.filter(status=RowStatus.UNKNOWN).values("object_id")
-        return self.ModelClass.objects.filter(id__in=ids)
+    @property
+    def is_archived(self):
+        return self.archived_at is not None
+
+    def archive_rows(self, batch_size=None, pause=0):
+        """Move ScribeRows of a COMPLETED store into ``archive``.
+
+        Once ``archived_at`` is set, the archive is the lineage of the store.
+        Rows are deleted afterwards in batches, and an interrupted call can
+        simply be repeated.
+        """
+        if self.status != self.Status.COMPLETED:
+            raise ScribeException("Only completed stores can be archived.")
+        if not self.is_archived:
+            values = (
+                self.row_set.order_by("object_index", "pk")
+                .values_list(*ARCHIVE_COLUMNS)
+                .iterator(chunk_size=batch_size or get_chunk_size())
+            )
+            write_archive(
+                self.archive,
+                "%s/%s.jsonl.gz" % (self.source.slug, self.slug),
+                row_groups(values, batch_size),
+            )
+            self.archived_at = timezone.now()
+            self.save(update_fields=["archive", "archived_at"])
+        self.delete_rows(batch_size, pause)
+
+    def restore_rows(self, batch_size=None):
+        """Restore ScribeRows from ``archive`` and delete the archive."""
+        if not self.is_archived:
+            return
+        with transaction.atomic(using=router.db_for_write(ScribeRow)):
+            self.delete_rows(batch_size)
+            for group in read_archive(self.archive):
+                ScribeRow.objects.bulk_create(
+                    [
+                        ScribeRow(store=self, **dict(zip(ARCHIVE_COLUMNS, values)))
+                        for values in zip(*(group[name] for name in ARCHIVE_COLUMNS))
+                    ]
+                )
+            self.archived_at = None
+            self.save(update_fields=["archived_at"])
+        self.archive.delete()
+
+    def iter_rows(self, content_type=None, status=None, chunk_size=None):
+        """Yield ScribeRows of the store, unsaved ones if it is archived."""
+        if not self.is_archived:
+            rows = self.row_set.order_by("object_index", "pk")
+            if content_type is not None:
+                rows = rows.filter(content_type=content_type)
+            if status is not None:
+                rows = rows.filter(status=status)
+            yield from rows.iterator(chunk_size=chunk_size or get_chunk_size())
+            return
+        for values in iter_archive(self.archive):
+            if (
+                content_type is not None
+                and values["content_type_id"] != content_type.pk
+            ):
+                continue
+            if status is not None and values["status"] != status:
+                continue
+            yield ScribeRow(store=self, **values)
+
+    def get_objects(self, model=None, status=None):
+        model = model or self.ModelClass
+        content_type = ContentType.objects.get_for_model(model)
+        if self.is_archived:
+            ids = [
+                row.object_id
+                for row in self.iter_rows(content_type, status)
+                if row.object_id is not None
+            ]
+            return model._default_manager.filter(pk__in=ids)
+        rows = self.row_set.filter(content_type=content_type)
+        if status is not None:
+            rows = rows.filter(status=status)
+        ids = rows.values("object_id")
+        if router.db_for_read(model) != router.db_for_read(ScribeRow):
+            # A subquery can't cross databases.
+            ids = list(ids.values_list("object_id", flat=True))
+        return model._default_manager.filter(pk__in=ids)
+
+    def iter_csv(self, model=None, status=None, chunk_size=None):
+        """Yield CSV lines of the objects of the store next to their lineage."""
+        from .export import iter_csv
+
+        return iter_csv(self, model, status, chunk_size)
+
+    def related(self, model=None):
+        return self.get_objects(model)
+
+    def created(self, model=None):
+        return self.get_objects(model, RowStatus.CREATED)
+
+    def updated(self, model=None):
+        return self.get_objects(model, RowStatus.UPDATED)
+
+    def deleted(self, model=None):
+        return self.get_objects(model, RowStatus.DELETED)
+
+    def unknown(self, model=None):
+        return self.get_objects(model, RowStatus.UNKNOWN)
 
     def delete_created(self):
-        if self.status == self.Status.COMPLETED:
-            for row in self.row_set.all():
-                if row.status == RowStatus.CREATED:
-                    row.target.delete()
-                    row.status = RowStatus.DELETED
-                    row.target = None
-                    row.save()
+        if self.status != self.Status.COMPLETED:
+            return
+        created = {}
+        for row in self.iter_rows():
+            if row.status == RowStatus.CREATED and row.object_id is not None:
+                created.setdefault(row.content_type_id, []).append(row.object_id)
+        targets = {
+            content_type_id: ContentType.objects.get_for_id(
+                content_type_id
+            ).model_class()
+            for content_type_id in created
+        }
+        databases = {router.db_for_write(ScribeRow)}
+        databases.update(router.db_for_write(model) for model in targets.values())
+        from .lineage import atomic
+
+        with atomic(databases):
+            for content_type_id, ids in created.items():
+                model = targets[content_type_id]
+                for chunk in chunked(ids, get_chunk_size()):
+                    model._default_manager.filter(pk__in=chunk).delete()
+            if self.is_archived:
+                self.rewrite_archive(self.mark_deleted)
+            else:
+                self.row_set.filter(status=RowStatus.CREATED).update(
+                    status=RowStatus.DELETED, content_type=None, object_id=None
+                )
+            self.deleted_count += self.created_count
+            self.created_count = 0
+            self.fingerprint_set.all().delete()
             self.status = self.Status.DELETED
             self.save()
 
+    @staticmethod
+    def mark_deleted(group):
+        for i, status in enumerate(group["status"]):
+            if status == RowStatus.CREATED:
+                group["status"][i] = RowStatus.DELETED.value
+                group["content_type_id"][i] = None
+                group["object_id"][i] = None
+        return group
+
+    def rewrite_archive(self, func):
+        """Apply ``func`` to every row group of the archive."""
+        old = self.archive.name
+        write_archive(
+            self.archive,
+            old.rsplit("/", 1)[-1],
+            (func(group) for group in read_archive(self.archive)),
+        )
+        self.save(update_fields=["archive"])
+        self.archive.storage.delete(old)
+
+
+class ScribePart(models.Model):
+    """A part file of a store of a manifest source."""
+
+    store = models.ForeignKey(
+        ScribeStore, on_delete=models.CASCADE, related_name="part_set"
+    )
+    index = models.PositiveIntegerField(help_text="Order in the manifest.")
+    url = models.URLField()
+    file = models.FileField(upload_to="scribe-store/part")
+    size = models.PositiveBigIntegerField(
+        blank=True, null=True, help_text="Downloaded bytes."
+    )
+    row_count = models.PositiveIntegerField(
+        blank=True, null=True, help_text="Rows without the header."
+    )
+    offset = models.PositiveIntegerField(
+        default=0, help_text="Rows of the previous parts. Added to object_index."
+    )
+    status = models.CharField(
+        max_length=1, choices=ScribeStore.Status.choices, default="D"
+    )
+    completed_at = models.DateTimeField(blank=True, null=True)
+    checkpoint = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        help_text="Last object_index whose target writes and lineage are committed"
+        " (lineage on a separate database).",
+    )
+    counts = models.JSONField(
+        default=dict, blank=True, help_text="Loaded rows per RowStatus."
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["store", "index"], name="scribe_store_unique_part"
+            )
+        ]
+
+    def __str__(self):
+        return "%s: %s" % (self.store.slug, self.index)
+
+
+class ScribeTarget(models.Model):
+    """Additional target of a source. The file is parsed once for all targets."""
+
+    source = models.ForeignKey(
+        ScribeSource, on_delete=models.CASCADE, related_name="target_set"
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    columns = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Map CSV columns to fields. Empty uses all columns. "
+        'ex) {"news_text": "question_text"}',
+    )
+    foreign_keys = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Resolve foreign keys by a field of the related model. "
+        'ex) {"question": "question_text"}',
+    )
+
+    def __str__(self):
+        return "%s -> %s" % (self.source, self.content_type)
+
+
+class TargetForeignKey(GenericForeignKey):
+    """GenericForeignKey which reads the target through the routers.
+
+    The lineage may be on another database than its targets.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None or self.is_cached(instance):
+            return super().__get__(instance, cls)
+        rel_obj = None
+        ct_id = getattr(instance, self.model._meta.get_field(self.ct_field).attname)
+        if ct_id is not None:
+            model = ContentType.objects.get_for_id(ct_id).model_class()
+            pk = getattr(instance, self.fk_field)
+            rel_obj = model._base_manager.filter(pk=pk).first()
+        self.set_cached_value(instance, rel_obj)
+        return rel_obj
+
 
 class ScribeRow(models.Model):
     store = models.ForeignKey(
@@ -218,7 +788,8 @@ class ScribeRow(models.Model):
         ContentType, on_delete=models.SET_NULL, blank=True, null=True
     )
     object_id = models.PositiveIntegerField(blank=True, null=True)
-    target = GenericForeignKey("content_type", "object_id")
+    target = TargetForeignKey("content_type", "object_id")
+    message = models.TextField(blank=True)
 
     def __str__(self):
         return "%s @%s -> index: %s" % (
@@ -241,3 +812,36 @@ class ScribeRow(models.Model):
     @admin.display(description="data")
     def get_data_formatted(self):
         return mark_safe("<pre>%s</pre>" % json.dumps(json.loads(self.data), indent=4))
+
+
+class ScribeFingerprint(models.Model):
+    """Latest hash of a row applied to a target object, for idempotent reloads."""
+
+    source = models.ForeignKey(
+        ScribeSource, on_delete=models.CASCADE, related_name="fingerprint_set"
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    key = models.CharField(
+        max_length=255,
+        help_text="Key value of the row, or its digest for a source without key.",
+    )
+    digest = models.CharField(max_length=32)
+    store = models.ForeignKey(
+        ScribeStore,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="fingerprint_set",
+    )
+    object_id = models.PositiveIntegerField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source", "content_type", "key"],
+                name="scribe_store_unique_fingerprint_key",
+            )
+        ]
+
+    def __str__(self):
+        return "%s: %s" % (self.source.slug, self.key)
@@ -0,0 +1,146 @@
+"""Load rows while the file is still being downloaded.
+
+A download thread writes the response to a temporary file and puts the same
+bytes into a bounded queue. The calling thread reads the queue as a text
+stream and loads it with ``ScribeStore.load_file``, so database work stays in
+the thread which owns the connection. The stored file is the temporary file,
+byte for byte.
+"""
+
+import io
+import queue
+import tempfile
+import threading
+
+import requests
+from django.conf import settings
+from django.core.files import File
+
+from .exceptions import BadHttpStatusException, ScribeException
+from .metrics import PhaseTimer, send_metrics
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def get_queue_size():
+    return getattr(settings, "SCRIBE_STORE_PIPELINE_QUEUE_SIZE", 64)
+
+
+class QueueReader(io.RawIOBase):
+    """Raw stream of the byte chunks put into a queue, ``None`` ends it."""
+
+    def __init__(self, chunks, on_eof=None):
+        self.chunks = chunks
+        self.on_eof = on_eof
+        self.buffer = b""
+        self.eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self.buffer and not self.eof:
+            chunk = self.chunks.get()
+            if isinstance(chunk, BaseException):
+                raise chunk
+            if chunk is None:
+                self.eof = True
+                if self.on_eof:
+                    self.on_eof()
+            else:
+                self.buffer = memoryview(chunk)
+        size = min(len(b), len(self.buffer))
+        b[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+
+class Pipeline:
+    """Tee a streamed response to storage and to a reader of ``store``."""
+
+    def __init__(self, store, response, queue_size=None, chunk_size=None):
+        self.store = store
+        self.response = response
+        self.chunk_size = chunk_size or DOWNLOAD_CHUNK_SIZE
+        self.chunks = queue.Queue(maxsize=queue_size or get_queue_size())
+        self.detached = threading.Event()
+        self.thread = threading.Thread(target=self.download, daemon=True)
+        self.phases = PhaseTimer()
+
+    def start(self):
+        self.thread.start()
+
+    def put(self, chunk):
+        # Once the reader is gone, the file is still downloaded and stored.
+        while not self.detached.is_set():
+            try:
+                self.chunks.put(chunk, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def download(self):
+        try:
+            with tempfile.TemporaryFile() as tmp:
+                size = 0
+                with self.phases.time("download"):
+                    for chunk in self.response.iter_content(self.chunk_size):
+                        tmp.write(chunk)
+                        size += len(chunk)
+                        self.put(chunk)
+                with self.phases.time("store"):
+                    tmp.seek(0)
+                    self.store.file.save(
+                        "%s/%s" % (self.store.source.slug, self.store.slug),
+                        File(tmp),
+                        save=False,
+                    )
+                self.store.size = size
+        except BaseException as error:
+            self.put(error)
+            return
+        finally:
+            self.response.close()
+        self.put(None)
+
+    def downloaded(self):
+        """Called by the reader in the loading thread at the end of the file."""
+        self.thread.join()
+        self.store.metrics["fetch"] = self.phases.as_dict()
+        self.store.save(update_fields=["file", "size", "metrics"])
+        send_metrics("fetched", self.store)
+
+    def open(self):
+        reader = QueueReader(self.chunks, on_eof=self.downloaded)
+        return io.TextIOWrapper(io.BufferedReader(reader))
+
+    def close(self):
+        self.detached.set()
+        self.thread.join()
+
+
+def scribe_pipelined(source, queue_size=None, chunk_size=None, store=None):
+    """Fetch and load a new store of ``source`` (or ``store``) at the same time."""
+    from .models import ScribeStore
+
+    if source.data_type != source.DataType.CSV:
+        raise ScribeException("Only CSV sources can be pipelined.")
+    if store is None:
+        store = ScribeStore(source=source, url=source.current_url)
+    response = requests.get(store.url, stream=True)
+    if response.status_code != 200:
+        response.close()
+        raise BadHttpStatusException("status code: %s" % response.status_code)
+    store.ensure_slug()
+    pipeline = Pipeline(store, response, queue_size, chunk_size)
+    pipeline.start()
+    try:
+        with pipeline.open() as csvfile:
+            store.load_file(csvfile)
+    finally:
+        pipeline.close()
+        if store.pk and store.file and not store.metrics.get("fetch"):
+            # The load failed before the end of the file. Keep the file.
+            store.metrics["fetch"] = pipeline.phases.as_dict()
+            store.save(update_fields=["file", "size", "metrics"])
+    return store
@@ -0,0 +1,114 @@
+"""Load plans shared by the stores of a source.
+
+Everything a load needs to know about a target model and a header is
+computed once and kept in a process-level bounded cache, keyed by source,
+header fingerprint, target model, column mapping and strip policy.
+"""
+
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+
+from .resolvers import LRUCache
+
+
+def get_strip_value():
+    return getattr(settings, "SCRIBE_STORE_STRIP_VALUE", True)
+
+
+def get_header_fingerprint(header):
+    return hashlib.sha1("\x1f".join(header).encode()).hexdigest()
+
+
+def get_row_fields(model, header, columns=None):
+    """Return the target field name of each header column.
+
+    Without ``columns``, a column is matched by field name or verbose name and
+    unmatched columns are kept as they are. With ``columns``, only the mapped
+    columns are used and the others are ``None``.
+    """
+    if columns:
+        return [columns.get(s) for s in header]
+    row_fields = []
+    field_names = {f.name for f in model._meta.fields}
+    verbose_name_to_name = {f.verbose_name: f.name for f in model._meta.fields}
+    for s in header:
+        if s in field_names:
+            row_fields.append(s)
+        elif s in verbose_name_to_name:
+            row_fields.append(verbose_name_to_name[s])
+        else:
+            row_fields.append(s)
+    return row_fields
+
+
+class LoadPlan:
+    """Column mapping, strip policy and hook dispatch of a target model."""
+
+    def __init__(self, model, header, columns=None, strip=True):
+        self.model = model
+        self.header_length = len(header)
+        self.row_fields = get_row_fields(model, header, columns)
+        self.indexes = [
+            (index, name) for index, name in enumerate(self.row_fields) if name
+        ]
+        self.strip = strip
+        self.content_type = ContentType.objects.get_for_model(model)
+        manager = model._default_manager
+        self.hook = None
+        for name in ("scribe_batch", "scribe_dict"):
+            if hasattr(manager, name):
+                self.hook = name
+                break
+
+    def clean_row(self, row):
+        if self.strip:
+            row = [f.strip() for f in row]
+        if not any(row):
+            return None
+        return row
+
+    def row_data(self, row):
+        length = len(row)
+        data = {name: row[index] for index, name in self.indexes if index < length}
+        if not any(data.values()):
+            return None
+        return data
+
+
+_cache = None
+_lock = threading.Lock()
+
+
+def get_plan_cache():
+    global _cache
+    if _cache is None:
+        _cache = LRUCache(getattr(settings, "SCRIBE_STORE_PLAN_CACHE_SIZE", 128))
+    return _cache
+
+
+def clear_plan_cache():
+    global _cache
+    _cache = None
+
+
+def get_load_plan(store, model, columns=None):
+    """Return the cached LoadPlan of ``model`` for the header of ``store``."""
+    strip = get_strip_value()
+    key = (
+        store.source_id,
+        get_header_fingerprint(store.header),
+        model._meta.label_lower,
+        json.dumps(columns or {}, sort_keys=True),
+        strip,
+    )
+    with _lock:
+        cache = get_plan_cache()
+        plan = cache.get(key)
+        if plan is None:
+            plan = LoadPlan(model, store.header, columns, strip)
+            cache.set(key, plan)
+    return plan
@@ -0,0 +1,134 @@
+"""Dry-run a load inside a rolled-back savepoint and project its cost.
+
+With ``sample``, rows are read by seeking to random offsets of the file, so
+a multi-GB file is never fully parsed. The counts of the sample are then
+scaled to the number of rows estimated from the file size.
+"""
+
+import csv
+import os
+import random
+from collections import Counter
+from time import perf_counter
+
+from django.db import transaction
+
+from . import RowStatus
+from .exceptions import ScribeException
+from .lineage import atomic
+from .metrics import PhaseTimer
+from .utils import chunked, get_chunk_size
+
+
+def read_rows(path):
+    """Yield ``(object_index, row)`` of every row."""
+    with open(path) as csvfile:
+        _ = next(csvfile)
+        yield from enumerate(csv.reader(csvfile), 1)
+
+
+def sample_rows(path, count, seed=None):
+    """Return up to ``count`` distinct ``(object_index, row)`` at random offsets.
+
+    A random byte offset is mapped to the line it falls in, so rows with
+    quoted line breaks may be cut. ``object_index`` is the order in the
+    sample, not the line number.
+    """
+    rng = random.Random(seed)
+    lines = {}
+    with open(path, "rb") as fp:
+        start = len(fp.readline())
+        end = os.fstat(fp.fileno()).st_size
+        if end <= start:
+            return [], 0
+        for _ in range(count):
+            fp.seek(rng.randrange(start, end) - 1)
+            fp.readline()
+            offset = fp.tell()
+            line = fp.readline()
+            if line and offset not in lines:
+                lines[offset] = line
+    sampled = [lines[offset] for offset in sorted(lines)]
+    rows = csv.reader(line.decode().rstrip("\r\n") for line in sampled)
+    bytes_per_row = sum(map(len, sampled)) / len(sampled) if sampled else 0
+    estimated = round((end - start) / bytes_per_row) if bytes_per_row else 0
+    return list(enumerate(rows, 1)), estimated
+
+
+def preview(store, sample=None, seed=None):
+    """Load ``store`` (or a sample of it) and roll back. Return a report."""
+    if store.status != store.Status.DOWNLOADED:
+        raise ScribeException("Only downloaded stores can be previewed.")
+    store.phases = PhaseTimer()
+    store.status_counts = Counter()
+    manifest = store.source.data_type == store.source.DataType.MANIFEST
+    if sample and manifest:
+        raise ScribeException("Manifest stores can't be sampled.")
+    if sample:
+        rows, estimated = sample_rows(store.file.path, sample, seed)
+    elif manifest:
+        from .manifest import iter_part_rows
+
+        rows, estimated = iter_part_rows(store), None
+    else:
+        rows, estimated = read_rows(store.file.path), None
+    parsed = 0
+    start = perf_counter()
+    databases = store.lineage_writer.databases
+    with atomic(databases):
+        for loader in store.loaders:
+            loader.prepare()
+        if store.source.backend == store.source.Backend.MERGE:
+            from .merge import MergeLoader
+
+            row_count, store.row_count = store.row_count, 0
+            MergeLoader(store).load(rows)
+            parsed, store.row_count = store.row_count, row_count
+        else:
+            for chunk in chunked(rows, get_chunk_size()):
+                parsed += len(chunk)
+                store.load_chunk(chunk)
+        lineage_rows = lineage_bytes = 0
+        for data, message in store.row_set.values_list("data", "message").iterator():
+            lineage_rows += 1
+            lineage_bytes += len(str(data)) + len(message)
+        for using in databases:
+            transaction.set_rollback(True, using=using)
+    seconds = perf_counter() - start
+    if estimated is None:
+        estimated = parsed
+    scale = estimated / parsed if parsed else 0
+    counts = {
+        status.label.lower(): store.status_counts.get(status, 0) for status in RowStatus
+    }
+    return {
+        "rows": parsed,
+        "sampled": bool(sample),
+        "estimated_rows": estimated,
+        "counts": counts,
+        "projected_counts": {
+            name: round(count * scale) for name, count in counts.items()
+        },
+        "error_rate": counts["error"] / lineage_rows if lineage_rows else 0,
+        "seconds": round(seconds, 6),
+        "projected_seconds": round(seconds * scale, 3),
+        "projected_lineage_rows": round(lineage_rows * scale),
+        "projected_lineage_bytes": round(lineage_bytes * scale),
+    }
+
+
+def format_report(report):
+    lines = [
+        "rows: %s%s" % (report["rows"], " (sampled)" if report["sampled"] else ""),
+        "estimated rows: %s" % report["estimated_rows"],
+    ]
+    for name, count in report["projected_counts"].items():
+        if count:
+            lines.append("%s: %s" % (name, count))
+    lines += [
+        "error rate: %.2f%%" % (report["error_rate"] * 100),
+        "projected load time: %.1fs" % report["projected_seconds"],
+        "projected lineage: %s rows, %s bytes"
+        % (report["projected_lineage_rows"], report["projected_lineage_bytes"]),
+    ]
+    return lines
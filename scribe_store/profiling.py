@@ -0,0 +1,147 @@
+"""Profile a scribe run.
+
+A profiled run records a cProfile of the calling thread, a tracemalloc
+snapshot and a log of the SQL queries of every database connection. They are
+saved as a zip file in ``ScribeStore.profile``:
+
+* ``profile.pstats``: cProfile stats, to be read with ``pstats.Stats``.
+* ``profile.txt``: functions sorted by cumulative time.
+* ``tracemalloc.txt``: lines which allocated the most memory still alive.
+* ``sql.json``: query count, total time and the slowest statements.
+
+Runs are profiled on demand, or a sample of them at
+``SCRIBE_STORE_PROFILE_RATE`` so it can stay enabled in production.
+"""
+
+import cProfile
+import io
+import json
+import marshal
+import pstats
+import random
+import tracemalloc
+import zipfile
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+
+TOP = 25
+
+
+def get_profile_rate():
+    return getattr(settings, "SCRIBE_STORE_PROFILE_RATE", 0)
+
+
+def should_profile(profile=None):
+    """``profile`` if given, otherwise a random draw at the profile rate."""
+    if profile is not None:
+        return bool(profile)
+    rate = get_profile_rate()
+    return bool(rate) and random.random() < rate
+
+
+class QueryLog:
+    """``execute_wrapper`` aggregating count and time per SQL statement."""
+
+    def __init__(self):
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stat = self.statements.setdefault(sql, [0, 0.0])
+            stat[0] += 1
+            stat[1] += perf_counter() - start
+
+    def as_dict(self):
+        top = sorted(self.statements.items(), key=lambda item: -item[1][1])[:TOP]
+        return {
+            "count": sum(count for count, _ in self.statements.values()),
+            "seconds": round(sum(s for _, s in self.statements.values()), 6),
+            "top": [
+                {"sql": sql, "count": count, "seconds": round(seconds, 6)}
+                for sql, (count, seconds) in top
+            ],
+        }
+
+
+class Profiler:
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.queries = QueryLog()
+        self.snapshot = None
+
+    @contextmanager
+    def capture(self):
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self.queries))
+                self.profile.enable()
+                try:
+                    yield
+                finally:
+                    self.profile.disable()
+            self.snapshot = tracemalloc.take_snapshot()
+        finally:
+            if started:
+                tracemalloc.stop()
+
+    def profile_text(self):
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).sort_stats("cumulative").print_stats(
+            TOP * 2
+        )
+        return out.getvalue()
+
+    def tracemalloc_text(self):
+        if self.snapshot is None:
+            return ""
+        snapshot = self.snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        return "".join("%s\n" % stat for stat in snapshot.statistics("lineno")[:TOP])
+
+    def archive(self):
+        self.profile.create_stats()
+        sql = self.queries.as_dict()
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("profile.pstats", marshal.dumps(self.profile.stats))
+            zf.writestr("profile.txt", self.profile_text())
+            zf.writestr("tracemalloc.txt", self.tracemalloc_text())
+            zf.writestr("sql.json", json.dumps(sql, indent=4))
+        return buffer.getvalue(), sql
+
+    def save(self, store):
+        content, sql = self.archive()
+        store.profile.save(
+            "%s/%s.zip" % (store.source.slug, store.slug),
+            ContentFile(content),
+            save=False,
+        )
+        store.metrics["profile"] = {"queries": sql["count"], "sql": sql["seconds"]}
+        store.save(update_fields=["profile", "metrics"])
+
+
+@contextmanager
+def profiled(store, profile=None):
+    """Profile the block and save the profile to ``store`` if it was saved."""
+    if not should_profile(profile):
+        yield
+        return
+    profiler = Profiler()
+    try:
+        with profiler.capture():
+            yield
+    finally:
+        if store.pk:
+            profiler.save(store)
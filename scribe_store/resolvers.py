@@ -0,0 +1,104 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+
+from .exceptions import ScribeException
+from .utils import chunked, get_chunk_size
+
+MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key, default=None):
+        if key not in self.data:
+            return default
+        self.data.move_to_end(key)
+        return self.data[key]
+
+    def set(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+
+class ForeignKeyResolver:
+    """Resolve foreign key columns by a natural key of the related model.
+
+    ``lookups`` maps a foreign key field name of ``model`` to a field name of
+    the related model, e.g. ``{"question": "question_text"}``. Distinct keys of
+    a chunk are fetched with one ``filter(field__in=...)`` query. Resolved keys
+    are cached, unknown ones are fetched again in later chunks, since the
+    related object may be created meanwhile by the same load.
+    """
+
+    def __init__(self, model, lookups, maxsize=None):
+        if maxsize is None:
+            maxsize = getattr(settings, "SCRIBE_STORE_FK_CACHE_SIZE", 10000)
+        self.fields = []
+        for name, lookup in lookups.items():
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                raise ScribeException("%s has no field %s." % (model, name))
+            if not (field.many_to_one or field.one_to_one) or not field.concrete:
+                raise ScribeException("%s.%s is not a foreign key." % (model, name))
+            self.fields.append((field, lookup, LRUCache(maxsize)))
+
+    def fetch(self, field, lookup, keys):
+        manager = field.related_model._default_manager
+        found = {}
+        for keys_chunk in chunked(keys, get_chunk_size()):
+            queryset = manager.filter(**{"%s__in" % lookup: keys_chunk})
+            for key, pk in queryset.values_list(lookup, field.target_field.attname):
+                # Ambiguous natural keys are treated as unknown.
+                found[str(key)] = MISSING if str(key) in found else pk
+        return {key: found.get(key, MISSING) for key in keys}
+
+    def resolve(self, datas):
+        """Return a list of ``(data, error)`` for ``datas``.
+
+        Resolved data has the related primary key under the field's attname.
+        ``data`` is ``None`` when a key could not be resolved.
+        """
+        known = []
+        for field, lookup, cache in self.fields:
+            keys = {str(d[field.name]) for d in datas if d.get(field.name)}
+            pks = {key: cache.get(key) for key in keys if key in cache}
+            missing = [key for key in keys if key not in pks]
+            if missing:
+                fetched = self.fetch(field, lookup, missing)
+                for key, pk in fetched.items():
+                    if pk is not MISSING:
+                        cache.set(key, pk)
+                pks.update(fetched)
+            known.append(pks)
+        results = []
+        for data in datas:
+            data = dict(data)
+            error = None
+            for (field, lookup, cache), pks in zip(self.fields, known):
+                if field.name not in data:
+                    continue
+                key = data.pop(field.name)
+                if not key:
+                    data[field.attname] = None
+                    continue
+                pk = pks[str(key)]
+                if pk is MISSING:
+                    error = "%s: unknown %s %r" % (field.name, lookup, key)
+                    break
+                data[field.attname] = pk
+            results.append((None, error) if error else (data, None))
+        return results
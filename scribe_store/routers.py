@@ -0,0 +1,33 @@
+from django.conf import settings
+
+
+def get_database():
+    return getattr(settings, "SCRIBE_STORE_DATABASE", None)
+
+
+class ScribeStoreRouter:
+    """Route the models of scribe_store to ``SCRIBE_STORE_DATABASE``.
+
+    Target models are left to the other routers, so the database of the
+    application only carries target writes.
+    """
+
+    app_label = "scribe_store"
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == self.app_label:
+            return get_database()
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if self.app_label in (obj1._meta.app_label, obj2._meta.app_label):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        database = get_database()
+        if database and app_label == self.app_label:
+            return db == database
+        return None
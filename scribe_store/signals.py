@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# Sent with ``store`` after ScribeSource.fetch saved a new ScribeStore.
+store_fetched = Signal()
+
+# Sent with ``store`` after ScribeStore.load_file completed.
+store_loaded = Signal()
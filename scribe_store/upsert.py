@@ -0,0 +1,130 @@
+"""Compare incoming row data with existing objects of a keyed target."""
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import models
+from django.utils import timezone
+
+from . import RowStatus
+from .exceptions import ScribeException
+from .validation import format_error
+
+
+def get_key_field(model, key):
+    """Return the field of ``model`` named ``key``. It must be unique."""
+    try:
+        field = model._meta.get_field(key)
+    except FieldDoesNotExist:
+        raise ScribeException("%s has no field %s." % (model, key))
+    if not field.concrete or field.is_relation or not field.unique:
+        raise ScribeException("%s.%s should be a unique field." % (model, key))
+    return field
+
+
+def to_python(field, value):
+    """Convert a CSV value to the value ``field`` holds after saving."""
+    if value == "" and field.null:
+        return None
+    value = field.to_python(value)
+    if (
+        isinstance(field, models.DateTimeField)
+        and value is not None
+        and settings.USE_TZ
+        and timezone.is_naive(value)
+    ):
+        value = timezone.make_aware(value)
+    return value
+
+
+class Changes:
+    """Convert row data of ``model`` and apply it to objects."""
+
+    def __init__(self, model):
+        self.model = model
+        self.fields = {}
+        for f in model._meta.concrete_fields:
+            self.fields[f.name] = f
+            self.fields[f.attname] = f
+
+    def convert(self, data):
+        """Return ``{attname: value}`` of ``data``. Raise ValidationError."""
+        values = {}
+        for name, value in data.items():
+            field = self.fields.get(name)
+            if field is None:
+                raise ValidationError("%s has no field %s." % (self.model, name))
+            values[field.attname] = to_python(field, value)
+        return values
+
+    def apply(self, obj, values):
+        """Set changed ``values`` on ``obj`` and return the changed field names."""
+        changed = []
+        for attname, value in values.items():
+            if getattr(obj, attname) != value:
+                setattr(obj, attname, value)
+                changed.append(self.fields[attname].name)
+        return changed
+
+
+class KeyedUpsert:
+    """Create or update objects of ``model`` by ``key``, a chunk at a time.
+
+    Existing objects are fetched with one IN query per chunk. Changed objects
+    are saved with one ``bulk_update`` of the changed fields per set of
+    changed fields, and rows which change nothing are IGNORED.
+    """
+
+    def __init__(self, model, key):
+        self.model = model
+        self.manager = model._default_manager
+        self.key_field = get_key_field(model, key)
+        self.changes = Changes(model)
+
+    def convert(self, items):
+        """Convert ``(object_index, data, original)`` items. Return items and errors."""
+        converted, errors = [], []
+        for object_index, data, original in items:
+            try:
+                values = self.changes.convert(data)
+            except ValidationError as error:
+                errors.append((object_index, original, format_error(error)))
+                continue
+            if values.get(self.key_field.attname) is None:
+                errors.append(
+                    (object_index, original, "Missing %s." % self.key_field.name)
+                )
+                continue
+            converted.append((object_index, values, original))
+        return converted, errors
+
+    def write(self, values_list):
+        """Return ``(obj, status)`` of each converted values.
+
+        Rows are applied in order, so a key repeated in the chunk updates the
+        object the earlier row created or updated.
+        """
+        attname = self.key_field.attname
+        existing = self.manager.in_bulk(
+            {values[attname] for values in values_list},
+            field_name=self.key_field.name,
+        )
+        results, changed = [], {}
+        for values in values_list:
+            key = values[attname]
+            obj = existing.get(key)
+            if obj is None:
+                existing[key] = obj = self.manager.create(**values)
+                results.append((obj, RowStatus.CREATED))
+                continue
+            fields = self.changes.apply(obj, values)
+            if fields:
+                changed.setdefault(id(obj), (obj, set()))[1].update(fields)
+                results.append((obj, RowStatus.UPDATED))
+            else:
+                results.append((obj, RowStatus.IGNORED))
+        groups = {}
+        for obj, fields in changed.values():
+            groups.setdefault(tuple(sorted(fields)), []).append(obj)
+        for fields, objs in groups.items():
+            self.manager.bulk_update(objs, fields)
+        return results
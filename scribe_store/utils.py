@@ -0,0 +1,13 @@
+from itertools import islice
+
+from django.conf import settings
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def get_chunk_size():
+    return getattr(settings, "SCRIBE_STORE_CHUNK_SIZE", 1000)
@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from .utils import chunked
+
+
+def get_validation_workers():
+    return getattr(settings, "SCRIBE_STORE_VALIDATION_WORKERS", 1)
+
+
+def format_error(error):
+    if isinstance(error, ValidationError) and hasattr(error, "error_dict"):
+        return "; ".join(
+            "%s: %s" % (field, " ".join(messages))
+            for field, messages in error.message_dict.items()
+        )
+    if isinstance(error, ValidationError):
+        return " ".join(error.messages)
+    return "%s: %s" % (type(error).__name__, error)
+
+
+class RowValidator:
+    """Validate row data with ``full_clean`` without touching the database.
+
+    Only the given columns are validated. Unique checks, constraints and foreign
+    keys need queries, so they are left to the database on insertion, where a
+    chunk failing with an IntegrityError is written again row by row (see
+    ``TargetLoader.write_or_split``).
+    """
+
+    def __init__(self, model, workers=None):
+        self.model = model
+        self.workers = get_validation_workers() if workers is None else workers
+        self.relations = {f.name for f in model._meta.concrete_fields if f.is_relation}
+        self.names = {}
+        for f in model._meta.concrete_fields:
+            self.names[f.name] = f.name
+            self.names[f.attname] = f.name
+        self.options = {"validate_unique": False}
+        if django.VERSION >= (4, 1):
+            self.options["validate_constraints"] = False
+
+    def validate_data(self, data):
+        try:
+            given = {self.names.get(key, key) for key in data}
+            exclude = [
+                name
+                for name in set(self.names.values())
+                if name not in given or name in self.relations
+            ]
+            self.model(**data).full_clean(exclude=exclude, **self.options)
+        except (ValidationError, TypeError, ValueError) as error:
+            return format_error(error)
+        return None
+
+    def validate_datas(self, datas):
+        return [self.validate_data(data) for data in datas]
+
+    def validate(self, datas):
+        """Return a list of error messages, ``None`` for valid data."""
+        if self.workers <= 1 or len(datas) <= 1:
+            return self.validate_datas(datas)
+        size = -(-len(datas) // self.workers)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(self.validate_datas, chunked(datas, size))
+        return [error for errors in results for error in errors]
@@ -0,0 +1,8 @@
+"""Benchmarks of fetch and load paths.
+
+Run from the ``tests`` directory::
+
+    $ PYTHONPATH=.. python -m benchmarks --rows 10000
+    $ PYTHONPATH=.. python -m benchmarks --rows 10000 --save
+    $ PYTHONPATH=.. python -m benchmarks --rows 10000 --compare
+"""
@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from .runner import baseline_key, compare, load_baseline, run, save_baseline  # noqa
+from .scenarios import SCENARIOS  # noqa: E402
+
+parser = argparse.ArgumentParser(prog="python -m benchmarks")
+parser.add_argument("scenarios", nargs="*", help="Default: all of %s" % list(SCENARIOS))
+parser.add_argument("--rows", type=int, default=10000)
+parser.add_argument("--columns", type=int, default=0, help="Extra columns.")
+parser.add_argument("--width", type=int, default=20, help="Characters of a value.")
+parser.add_argument("--baseline", default="benchmarks/baseline.json")
+parser.add_argument("--save", action="store_true", help="Save results as baseline.")
+parser.add_argument("--compare", action="store_true", help="Fail on regressions.")
+parser.add_argument("--tolerance", type=float, default=0.2)
+args = parser.parse_args()
+for name in args.scenarios:
+    if name not in SCENARIOS:
+        parser.error("unknown scenario: %s" % name)
+
+setup_test_environment()
+old_name = connection.creation.create_test_db(verbosity=0)
+try:
+    results = run(
+        args.scenarios or list(SCENARIOS), args.rows, args.columns, args.width
+    )
+finally:
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+
+baseline = load_baseline(args.baseline)
+regressions = []
+print(
+    "%-20s %12s %10s %14s %14s"
+    % ("scenario", "per sec", "unit", "queries/unit", "peak memory")
+)
+for name, result in results.items():
+    print(
+        "%-20s %12.1f %10s %14.4f %14d"
+        % (
+            name,
+            result["per_sec"],
+            result["unit"],
+            result["queries_per_unit"],
+            result["peak_memory"],
+        )
+    )
+    key = baseline_key(name, args.rows, args.columns, args.width)
+    if args.compare and key in baseline:
+        for message in compare(result, baseline[key], args.tolerance):
+            regressions.append("%s: %s" % (name, message))
+    if args.save:
+        baseline[key] = result
+
+if args.save:
+    save_baseline(args.baseline, baseline)
+for message in regressions:
+    print("REGRESSION", message, file=sys.stderr)
+sys.exit(1 if regressions else 0)
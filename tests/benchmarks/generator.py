@@ -0,0 +1,28 @@
+import csv
+import random
+import string
+from datetime import date, timedelta
+
+BASE_COLUMNS = ["slug", "news_text", "pub_date"]
+
+
+def generate_csv(fp, rows, columns=0, width=20, seed=0):
+    """Write a news-like CSV to ``fp``.
+
+    Every row has a unique ``slug``, ``news_text`` of ``width`` characters and
+    ``pub_date``, followed by ``columns`` extra columns of ``width`` characters.
+    """
+    rand = random.Random(seed)
+    letters = string.ascii_letters + " "
+    writer = csv.writer(fp)
+    writer.writerow(BASE_COLUMNS + ["extra_%s" % i for i in range(columns)])
+    start = date(2023, 6, 1)
+    for i in range(rows):
+        writer.writerow(
+            [
+                "news-%s" % i,
+                "".join(rand.choices(letters, k=width)),
+                (start + timedelta(days=i % 365)).isoformat(),
+            ]
+            + ["".join(rand.choices(letters, k=width)) for _ in range(columns)]
+        )
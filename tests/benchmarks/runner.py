@@ -0,0 +1,58 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.db import transaction
+from django.test.utils import override_settings
+
+from .generator import generate_csv
+from .scenarios import CHANGED_FILE, SCENARIOS
+from .server import serve
+
+
+def run(names, rows, columns=0, width=20):
+    """Run scenarios against a generated file served over local HTTP.
+
+    ``CHANGED_FILE`` has the same slugs with other values. Each scenario runs
+    in a transaction which is rolled back afterwards.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, override_settings(MEDIA_ROOT=tmp):
+        with open(Path(tmp) / "data.csv", "w", newline="") as fp:
+            generate_csv(fp, rows, columns, width)
+        with open(Path(tmp) / CHANGED_FILE, "w", newline="") as fp:
+            generate_csv(fp, rows, columns, width, seed=1)
+        with serve(tmp) as base_url:
+            for name in names:
+                with transaction.atomic():
+                    results[name] = SCENARIOS[name](base_url + "/data.csv", rows)
+                    transaction.set_rollback(True)
+    return results
+
+
+def baseline_key(name, rows, columns, width):
+    return "%s:rows=%s:columns=%s:width=%s" % (name, rows, columns, width)
+
+
+def load_baseline(path):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baseline(path, baseline):
+    Path(path).write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+def compare(result, base, tolerance):
+    """Return regression messages of ``result`` against ``base``."""
+    messages = []
+    if result["per_sec"] < base["per_sec"] * (1 - tolerance):
+        messages.append(
+            "%s/sec %s < %s" % (result["unit"], result["per_sec"], base["per_sec"])
+        )
+    for key in ("queries_per_unit", "peak_memory"):
+        if result[key] > base[key] * (1 + tolerance):
+            messages.append("%s %s > %s" % (key, result[key], base[key]))
+    return messages
@@ -0,0 +1,158 @@
+import tracemalloc
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+
+from scribe_store.models import ScribeSource, ScribeTarget
+
+from .generator import BASE_COLUMNS
+
+COLUMNS = {name: name for name in BASE_COLUMNS}
+CHANGED_FILE = "changed.csv"
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def fixture(setup):
+    """Yield the function returned by ``setup`` and roll its run back."""
+    with transaction.atomic():
+        yield setup()
+        transaction.set_rollback(True)
+
+
+def measure(unit, count, setup):
+    """Return throughput, queries per unit and peak memory of a scenario.
+
+    ``setup`` builds the fixture of a run and returns the function to
+    measure. tracemalloc slows allocations down, so the function is timed in
+    a first run without it, and its peak memory is traced in a second run on
+    a fresh fixture. Both runs are rolled back.
+    """
+    counter = QueryCounter()
+    with fixture(setup) as func:
+        with connection.execute_wrapper(counter):
+            start = perf_counter()
+            func()
+            seconds = perf_counter() - start
+    with fixture(setup) as func:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {
+        "unit": unit,
+        "count": count,
+        "seconds": round(seconds, 4),
+        "per_sec": round(count / seconds, 1),
+        "queries_per_unit": round(counter.count / count, 4),
+        "peak_memory": peak,
+    }
+
+
+def make_source(url, model, backend=ScribeSource.Backend.ORM):
+    source = ScribeSource.objects.create(
+        slug="bench-%s" % model, url=url, backend=backend
+    )
+    ScribeTarget.objects.create(
+        source=source,
+        content_type=ContentType.objects.get(model=model),
+        columns=COLUMNS,
+    )
+    return source
+
+
+def create(url, rows):
+    return measure("rows", rows, lambda: make_source(url, "news").scribe)
+
+
+def create_native(url, rows):
+    def setup():
+        return make_source(url, "news", ScribeSource.Backend.NATIVE).scribe
+
+    return measure("rows", rows, setup)
+
+
+def scribe_dict_ignore(url, rows):
+    """Second load through NewsBManager.scribe_dict: every row exists."""
+
+    def setup():
+        source = make_source(url, "newsb")
+        source.scribe()
+        return source.scribe
+
+    return measure("rows", rows, setup)
+
+
+def scribe_dict_update(url, rows):
+    """Reload with CHANGED_FILE through NewsCManager.scribe_dict: rows update."""
+
+    def setup():
+        source = make_source(url, "newsc")
+        source.scribe()
+        source.url = url.rsplit("/", 1)[0] + "/" + CHANGED_FILE
+        source.save()
+        return source.scribe
+
+    return measure("rows", rows, setup)
+
+
+def delete_created(url, rows):
+    def setup():
+        source = make_source(url, "news")
+        source.scribe()
+        return source.store_set.get().delete_created
+
+    return measure("rows", rows, setup)
+
+
+def admin_lineage(url, rows):
+    def setup():
+        source = make_source(url, "news")
+        source.scribe()
+        store = source.store_set.get()
+        user = get_user_model().objects.create_superuser("bench", "", "bench")
+        client = Client()
+        client.force_login(user)
+        urls = [
+            reverse("admin:scribe_store_scriberow_changelist"),
+            reverse(
+                "admin:scribe_store_scriberow_change",
+                args=[store.row_set.first().pk],
+            ),
+            reverse("admin:scribe_store_scribestore_changelist"),
+            reverse("admin:scribe_store_scribestore_change", args=[store.pk]),
+        ]
+
+        def get():
+            for admin_url in urls:
+                response = client.get(admin_url)
+                assert response.status_code == 200, admin_url
+
+        return get
+
+    return measure("requests", 4, setup)  # The admin pages of get().
+
+
+SCENARIOS = {
+    "create": create,
+    "create-native": create_native,
+    "scribe-dict-ignore": scribe_dict_ignore,
+    "scribe-dict-update": scribe_dict_update,
+    "delete-created": delete_created,
+    "admin-lineage": admin_lineage,
+}
@@ -1,6 +1,9 @@
 from django.db import models
+from django.utils.functional import cached_property
 
 from scribe_store import RowStatus
+from scribe_store.upsert import Changes
+
 
 class Question(models.Model):
     question_text = models.CharField(max_length=200)
@@ -32,13 +35,20 @@ class NewsB(models.Model):
 
 
 class NewsCManager(models.Manager):
+    @cached_property
+    def changes(self):
+        return Changes(self.model)
+
     def scribe_dict(self, data):
-        if self.filter(slug=data["slug"]).exists():
-            news = self.get(slug=data["slug"])
-            news.news_text = data["news_text"]
-            news.save()
-            return news, RowStatus.UPDATED
-        return self.create(**data)
+        news = self.filter(slug=data["slug"]).first()
+        if news is None:
+            return self.create(**data)
+        values = self.changes.convert({"news_text": data["news_text"]})
+        changed = self.changes.apply(news, values)
+        if not changed:
+            return news, RowStatus.IGNORED
+        news.save(update_fields=changed)
+        return news, RowStatus.UPDATED
 
 
 class NewsC(models.Model):
@@ -49,14 +59,32 @@ class NewsC(models.Model):
     objects = NewsCManager()
 
 
-class ChoiceManager(models.Manager):
-    def scribe_dict(self, data):
-        print(data)
+class NewsDManager(models.Manager):
+    def scribe_batch(self, datas):
+        exists = set(
+            self.filter(slug__in=[d["slug"] for d in datas]).values_list(
+                "slug", flat=True
+            )
+        )
+        results = []
+        for data in datas:
+            if data["slug"] in exists:
+                results.append(None)
+            else:
+                results.append(self.create(**data))
+                exists.add(data["slug"])
+        return results
+
+
+class NewsD(models.Model):
+    slug = models.SlugField(unique=True)
+    news_text = models.CharField(max_length=200)
+    pub_date = models.DateTimeField("date published")
+
+    objects = NewsDManager()
 
 
 class Choice(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     choice_text = models.CharField(max_length=200)
     votes = models.IntegerField(default=0)
-
-    objects = ChoiceManager()
@@ -1,20 +1,50 @@
+import json
+import zipfile
+from unittest.mock import patch
+
 import click
 import responses
+from asgiref.sync import async_to_sync
+from benchmarks.runner import compare, run
+from benchmarks.scenarios import SCENARIOS
+from django.contrib import admin
+from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.management import call_command
+from django.db import connection
 from django.db.utils import IntegrityError
-from django.test import TestCase, override_settings
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
 from freezegun import freeze_time
-from sample.models import News, NewsB, NewsC, Question
+from sample.admin import QuestionAdmin
+from sample.models import Choice, News, NewsB, NewsC, NewsD, Question
 
+from scribe_store import RowStatus, aio, manifest
+from scribe_store.archive import read_archive
+from scribe_store.exceptions import ScribeException
+from scribe_store.indexes import get_target_indexes
+from scribe_store.loaders import TargetLoader
+from scribe_store.pipeline import scribe_pipelined
+from scribe_store.signals import store_fetched, store_loaded
 from scribe_store.models import (
     BadHttpStatusException,
     ScribeRow,
     ScribeSource,
     ScribeStore,
+    ScribeTarget,
 )
 
+metrics_hook_calls = []
+
+
+def metrics_hook(event, store):
+    metrics_hook_calls.append((event, store.slug))
+
 
 class ScribeTest(TestCase):
     def test_something(self):
@@ -63,6 +93,15 @@ class ScribeTest(TestCase):
         )
         return source
 
+    def delete_store_files(self, source):
+        """Delete the files of the stores of ``source`` after the test."""
+
+        def delete():
+            for store in source.store_set.all():
+                store.delete_files()
+
+        self.addCleanup(delete)
+
     def scribe_sample_question(self, key, target_name=None):
         source = self.get_source("question", key, target_name)
         source.scribe()
@@ -96,6 +135,86 @@ class ScribeTest(TestCase):
         self.assertEqual(ScribeRow.objects.count(), 6)
         self.assertEqual(Question.objects.count(), 6)
 
+    @responses.activate
+    def test_idempotent_reload(self):
+        source = self.get_source("question", "simple")
+        source.idempotent = True
+        source.save()
+        source.scribe()
+        source.scribe()
+        self.assertEqual(Question.objects.count(), 3)
+        first, second = source.store_set.order_by("pk")
+        self.assertEqual((first.created_count, first.ignored_count), (3, 0))
+        self.assertEqual((second.created_count, second.ignored_count), (0, 3))
+        row = second.row_set.get(object_index=1)
+        self.assertEqual(row.message, "Already applied.")
+        self.assertEqual(row.object_id, first.row_set.get(object_index=1).object_id)
+        first.delete_created()
+        source.scribe()
+        self.assertEqual(source.store_set.latest("pk").created_count, 3)
+
+    @responses.activate
+    def test_idempotent_key_revert(self):
+        for text in ("A", "B", "A"):
+            responses.add(
+                responses.GET,
+                "https://example.com/data",
+                body="slug,news_text,pub_date\nhello,%s,2023-06-12\n" % text,
+            )
+        source = ScribeSource.objects.create(
+            slug="news",
+            url="https://example.com/data",
+            target=ContentType.objects.get(model="news"),
+            key="slug",
+            idempotent=True,
+        )
+        for text in ("A", "B", "A"):
+            source.scribe()
+            self.assertEqual(News.objects.get().news_text, text)
+        store = source.store_set.latest("pk")
+        self.assertEqual((store.updated_count, store.ignored_count), (1, 0))
+        source.scribe()
+        self.assertEqual(source.store_set.latest("pk").ignored_count, 1)
+
+    @override_settings(SCRIBE_STORE_CHUNK_SIZE=1)
+    @responses.activate
+    def test_idempotent_retry(self):
+        def load_chunk(loader, rows):
+            if rows[0][0] == 2 and not retried:
+                raise ScribeException("Interrupted")
+            return original(loader, rows)
+
+        original = TargetLoader.load_chunk
+        retried = False
+        source = self.get_source("question", "simple")
+        source.idempotent = True
+        source.save()
+        with patch.object(TargetLoader, "load_chunk", autospec=True) as mocked:
+            mocked.side_effect = load_chunk
+            with self.assertRaises(ScribeException):
+                source.scribe()
+            retried = True
+            store = source.store_set.get()
+            store.load_file()
+        store.refresh_from_db()
+        self.assertEqual(
+            sorted(store.row_set.values_list("object_index", "status")),
+            [(1, "C"), (2, "C"), (3, "C")],
+        )
+        self.assertEqual((store.created_count, store.ignored_count), (3, 0))
+        self.assertEqual(Question.objects.count(), 3)
+
+    @responses.activate
+    def test_load_plan_cached(self):
+        source = self.scribe_sample_question("simple")
+        source.scribe()
+        first, second = source.store_set.order_by("pk")
+        self.assertIs(first.loaders[0].plan, second.loaders[0].plan)
+        with override_settings(SCRIBE_STORE_STRIP_VALUE=False):
+            third = ScribeStore.objects.get(pk=second.pk)
+            self.assertIsNot(third.loaders[0].plan, second.loaders[0].plan)
+            self.assertFalse(third.loaders[0].plan.strip)
+
     @freeze_time("2023-06-13 23:00:00")  # freeze as utc
     @responses.activate
     def test_strftime(self):
@@ -148,6 +267,576 @@ class ScribeTest(TestCase):
         self.scribe_sample_question("nameheader")
         self.assertEqual(Question.objects.count(), 3)
 
+    def scribe_sample_choice(self, key):
+        Question.objects.create(
+            question_text="Is this a question?", pub_date=timezone.now()
+        )
+        Question.objects.create(
+            question_text="How is the date converted?", pub_date=timezone.now()
+        )
+        source = self.get_source("choice", key)
+        source.foreign_keys = {"question": "question_text"}
+        source.save()
+        source.scribe()
+        return source
+
+    @responses.activate
+    def test_choice_foreign_keys(self):
+        source = self.scribe_sample_choice("simple")
+        store = source.store_set.get()
+        self.assertEqual(Choice.objects.count(), 3)
+        self.assertEqual(
+            Choice.objects.filter(question__question_text="Is this a question?")
+            .order_by("id")
+            .get(choice_text="No")
+            .votes,
+            0,
+        )
+        error = store.row_set.get(status=RowStatus.ERROR)
+        self.assertEqual(error.object_index, 3)
+        self.assertIsNone(error.object_id)
+        self.assertIn("Is this an unknown question?", error.message)
+        self.assertEqual(
+            store.row_set.get(object_index=1).data,
+            '{"question": "Is this a question?", "choice_text": "Yes", "votes": "1"}',
+        )
+
+    @responses.activate
+    def test_defer_indexes(self):
+        target = get_target_indexes(Choice)
+        names = target.get_names()
+        self.assertTrue(names)
+        during = []
+        load_rows = ScribeStore.load_rows
+
+        def record(store, rows):
+            during.append(target.get_names())
+            load_rows(store, rows)
+
+        with patch.object(ScribeStore, "load_rows", record):
+            source = self.scribe_sample_choice("simple")
+            store = source.store_set.get()
+            self.assertEqual(during, [names])
+            source.defer_indexes = True
+            source.save()
+            Choice.objects.all().delete()
+            source.scribe()
+        self.assertEqual(during[1], set())
+        self.assertEqual(target.get_names(), names)
+        store = source.store_set.latest("pk")
+        self.assertEqual(store.deferred_indexes, [])
+        self.assertIn("indexes", store.metrics["load"])
+        with patch.object(ScribeStore, "load_rows", side_effect=ValueError):
+            Choice.objects.all().delete()
+            with self.assertRaises(ValueError):
+                source.scribe()
+        self.assertEqual(target.get_names(), names)
+        self.assertEqual(source.store_set.latest("pk").deferred_indexes, [])
+
+    @responses.activate
+    def test_choice_foreign_keys_cached(self):
+        Question.objects.create(
+            question_text="Is this a question?", pub_date=timezone.now()
+        )
+        source = self.get_source("choice", "simple")
+        source.foreign_keys = {"question": "question_text"}
+        source.save()
+        source.fetch()
+        store = source.store_set.get()
+        resolver = store.loaders[0].resolver
+        # Only keys which are not cached yet are queried.
+        with self.assertNumQueries(1):
+            resolver.resolve([{"question": "Is this a question?"}] * 2)
+        with self.assertNumQueries(0):
+            resolver.resolve([{"question": "Is this a question?"}])
+        with self.assertNumQueries(1):
+            results = resolver.resolve(
+                [
+                    {"question": "Is this a question?"},
+                    {"question": "How is the date converted?"},
+                ]
+            )
+        self.assertIsNotNone(results[0][0])
+        self.assertIsNone(results[1][0])
+        self.assertIn("How is the date converted?", results[1][1])
+        # Unknown keys are not cached: the question may be created later.
+        Question.objects.create(
+            question_text="How is the date converted?", pub_date=timezone.now()
+        )
+        with self.assertNumQueries(1):
+            results = resolver.resolve([{"question": "How is the date converted?"}])
+        self.assertIsNotNone(results[0][0])
+
+    def scribe_sample_news_validated(self, key):
+        source = self.get_source("news", key)
+        source.validate = True
+        source.save()
+        source.scribe()
+        return source
+
+    @responses.activate
+    def test_validate(self):
+        source = self.scribe_sample_news_validated("invalid")
+        store = source.store_set.get()
+        self.assertEqual(store.status, store.Status.COMPLETED)
+        self.assertEqual(
+            list(News.objects.order_by("slug").values_list("slug", flat=True)),
+            ["hello-world", "hello-world-5"],
+        )
+        errors = store.row_set.filter(status=RowStatus.ERROR).order_by("object_index")
+        self.assertEqual([row.object_index for row in errors], [2, 3, 4])
+        self.assertTrue(errors[0].message.startswith("slug: "))
+        self.assertTrue(errors[1].message.startswith("pub_date: "))
+        self.assertEqual(errors[2].message, "Expected 3 columns, got 4.")
+
+    @responses.activate
+    def test_validate_unique(self):
+        source = self.scribe_sample_news_validated("uniqueinvalid")
+        store = source.store_set.get()
+        self.assertEqual(store.status, store.Status.COMPLETED)
+        self.assertEqual(News.objects.count(), 2)
+        self.assertEqual((store.created_count, store.error_count), (2, 1))
+        error = store.row_set.get(status=RowStatus.ERROR)
+        self.assertEqual(error.object_index, 2)
+        self.assertTrue(error.message.startswith("IntegrityError: "))
+
+    @override_settings(SCRIBE_STORE_VALIDATION_WORKERS=2)
+    @responses.activate
+    def test_validate_workers(self):
+        source = self.scribe_sample_news_validated("invalid")
+        store = source.store_set.get()
+        self.assertEqual(store.created().count(), 2)
+        self.assertEqual(store.row_set.filter(status=RowStatus.ERROR).count(), 3)
+
+    @responses.activate
+    def test_scribe_batch(self):
+        source = self.get_source("news", "uniqueinvalid", "newsd")
+        source.scribe()
+        store = source.store_set.get()
+        self.assertEqual(NewsD.objects.count(), 2)
+        self.assertEqual(store.created().count(), 2)
+        self.assertEqual(store.row_set.get(object_index=2).status, RowStatus.IGNORED)
+
+    @responses.activate
+    def test_multiple_targets(self):
+        source = self.get_source("news", "uniqueinvalid", "newsb")
+        ScribeTarget.objects.create(
+            source=source, content_type=ContentType.objects.get(model="newsd")
+        )
+        ScribeTarget.objects.create(
+            source=source,
+            content_type=ContentType.objects.get(model="question"),
+            columns={"news_text": "question_text", "pub_date": "pub_date"},
+        )
+        source.scribe()
+        self.assertEqual(len(responses.calls), 1)
+        store = source.store_set.get()
+        self.assertEqual(NewsB.objects.count(), 2)
+        self.assertEqual(NewsD.objects.count(), 2)
+        self.assertEqual(Question.objects.count(), 3)
+        self.assertEqual(store.row_set.count(), 9)
+        self.assertEqual(store.created().count(), 2)
+        self.assertEqual(store.created(NewsD).count(), 2)
+        self.assertEqual(store.created(Question).count(), 3)
+        self.assertEqual(
+            store.row_set.get(
+                object_index=2, content_type=ContentType.objects.get(model="question")
+            ).data,
+            '{"question_text": "Hello, world 2!", "pub_date": "2023-06-13"}',
+        )
+
+    @override_settings(SCRIBE_STORE_METRICS_HOOK=__name__ + ".metrics_hook")
+    @responses.activate
+    def test_metrics(self):
+        received = []
+
+        def receiver(sender, store, **kwargs):
+            received.append(dict(store.metrics))
+
+        store_fetched.connect(receiver)
+        store_loaded.connect(receiver)
+        self.addCleanup(store_fetched.disconnect, receiver)
+        self.addCleanup(store_loaded.disconnect, receiver)
+        metrics_hook_calls.clear()
+        source = self.scribe_sample_question("emptylines")
+        store = source.store_set.get()
+        with open("sample/data/question/emptylines.csv", "rb") as fp:
+            self.assertEqual(store.size, len(fp.read()))
+        self.assertEqual(store.row_count, 5)
+        self.assertEqual(set(store.metrics), {"fetch", "load"})
+        self.assertIn("download", store.metrics["fetch"])
+        for key in ("parse", "convert", "lineage", "total", "rows_per_sec"):
+            self.assertIn(key, store.metrics["load"])
+        self.assertIsNone(store.metrics["load"]["peak_memory"])
+        self.assertEqual(
+            [set(metrics) for metrics in received], [{"fetch"}, {"fetch", "load"}]
+        )
+        self.assertEqual(
+            metrics_hook_calls, [("fetched", store.slug), ("loaded", store.slug)]
+        )
+
+    def scribe_daily(self):
+        source = self.get_source("question", "simple")
+        for day in ("2023-06-01", "2023-06-02", "2023-06-03"):
+            with freeze_time(day):
+                source.scribe()
+        return source, list(source.store_set.order_by("downloaded_at"))
+
+    @responses.activate
+    def test_profile(self):
+        source = self.get_source("question", "simple")
+        self.delete_store_files(source)
+        source.scribe()
+        self.assertFalse(source.store_set.get().profile)
+        source.scribe(profile=True)
+        store = source.store_set.latest("pk")
+        with store.profile.open("rb") as fp, zipfile.ZipFile(fp) as zf:
+            self.assertEqual(
+                sorted(zf.namelist()),
+                ["profile.pstats", "profile.txt", "sql.json", "tracemalloc.txt"],
+            )
+            self.assertIn("load_file", zf.read("profile.txt").decode())
+            sql = json.loads(zf.read("sql.json"))
+        self.assertGreater(sql["count"], 0)
+        self.assertEqual(store.metrics["profile"]["queries"], sql["count"])
+        self.assertGreater(store.metrics["load"]["peak_memory"], 0)
+        with override_settings(SCRIBE_STORE_PROFILE_RATE=1):
+            call_command("scribe", source.slug)
+        self.assertTrue(source.store_set.latest("pk").profile)
+        name = store.profile.name
+        store.prune()
+        self.assertFalse(default_storage.exists(name))
+
+    @responses.activate
+    def test_prune_keep_stores(self):
+        source, stores = self.scribe_daily()
+        source.keep_stores = 1
+        source.save()
+        call_command("scribe_prune", batch_size=2, pause=0)
+        self.assertEqual(list(source.store_set.all()), stores[2:])
+        self.assertEqual(ScribeRow.objects.count(), 3)
+        self.assertFalse(default_storage.exists(stores[0].file.name))
+        self.assertTrue(default_storage.exists(stores[2].file.name))
+        self.assertEqual(Question.objects.count(), 9)
+
+    @freeze_time("2023-06-04")
+    @responses.activate
+    def test_prune_keep_days_and_lineage(self):
+        source, stores = self.scribe_daily()
+        source.keep_days = 2
+        source.keep_lineage = True
+        source.save()
+        self.assertEqual(list(source.expired_stores()), stores[:1])
+        source.prune()
+        self.assertEqual(source.store_set.count(), 3)
+        self.assertEqual(ScribeRow.objects.count(), 9)
+        stores[0].refresh_from_db()
+        self.assertFalse(stores[0].file)
+        self.assertEqual(list(source.expired_stores()), [])
+
+    @responses.activate
+    def test_prune_skips_loading(self):
+        source, stores = self.scribe_daily()
+        ScribeStore.objects.filter(pk=stores[0].pk).update(
+            status=ScribeStore.Status.LOADING
+        )
+        source.keep_stores = 0
+        source.save()
+        self.assertEqual(list(source.expired_stores()), stores[1:])
+
+    @responses.activate
+    def test_prune_keeps_completed_during_load(self):
+        source, stores = self.scribe_daily()
+        ScribeStore.objects.filter(pk=stores[2].pk).update(
+            status=ScribeStore.Status.LOADING
+        )
+        source.keep_stores = 1
+        source.save()
+        self.assertEqual(list(source.expired_stores()), stores[:1])
+
+    @responses.activate
+    def test_archive_rows(self):
+        source = self.get_source("news", "1update2create", "newsc")
+        self.delete_store_files(source)
+        source.scribe()
+        store = source.store_set.get()
+        rows = list(store.row_set.values_list("object_index", "status", "object_id"))
+        store.archive_rows(batch_size=2)
+        store.refresh_from_db()
+        self.assertTrue(store.is_archived)
+        self.assertEqual(store.row_set.count(), 0)
+        self.assertEqual(
+            sorted((r.object_index, r.status, r.object_id) for r in store.iter_rows()),
+            sorted(rows),
+        )
+        self.assertEqual(store.created().count(), 3)
+        self.assertEqual(store.related(NewsC).count(), 3)
+        store.delete_created()
+        self.assertEqual(NewsC.objects.count(), 0)
+        self.assertEqual({r.status for r in store.iter_rows()}, {RowStatus.DELETED})
+        archive = store.archive.name
+        store.restore_rows()
+        self.assertFalse(store.is_archived)
+        self.assertEqual(store.row_set.count(), 3)
+        self.assertFalse(default_storage.exists(archive))
+
+    @responses.activate
+    def test_restore_rows_atomic(self):
+        def interrupted(archive):
+            yield next(read_archive(archive))
+            raise ScribeException("Interrupted")
+
+        source = self.scribe_sample_question("simple")
+        self.delete_store_files(source)
+        store = source.store_set.get()
+        store.archive_rows(batch_size=1)
+        with patch("scribe_store.models.read_archive", side_effect=interrupted):
+            with self.assertRaises(ScribeException):
+                store.restore_rows()
+        store.refresh_from_db()
+        self.assertTrue(store.is_archived)
+        self.assertEqual(store.row_set.count(), 0)
+        store.restore_rows()
+        self.assertEqual(store.row_set.count(), 3)
+
+    @responses.activate
+    def test_archive_admin_mixin(self):
+        source = self.scribe_sample_question("simple")
+        self.delete_store_files(source)
+        store = source.store_set.get()
+        store.archive_rows()
+        question = Question.objects.first()
+        model_admin = QuestionAdmin(Question, admin.site)
+        rows = model_admin.get_scribe_rows(question)
+        self.assertEqual(len(rows), 1)
+        with patch.object(ScribeStore, "iter_rows", side_effect=AssertionError):
+            self.assertIn("(archived)", model_admin.scribe_row(question))
+            self.assertIn(question.question_text, model_admin.scribe_data(question))
+        self.assertEqual(model_admin.scribe_row_list(Question.objects.first()), "")
+
+    @responses.activate
+    def test_scribe_pipelined(self):
+        source = self.get_source("question", "simple")
+        source.scribe(pipelined=True)
+        store = source.store_set.get()
+        self.assertEqual(store.status, store.Status.COMPLETED)
+        self.assertEqual(Question.objects.count(), 3)
+        self.assertEqual(store.created().count(), 3)
+        with open("sample/data/question/simple.csv", "rb") as fp:
+            content = fp.read()
+        with store.file.open("rb") as fp:
+            self.assertEqual(fp.read(), content)
+        self.assertEqual(store.size, len(content))
+        self.assertEqual(set(store.metrics), {"fetch", "load"})
+
+    @responses.activate
+    def test_scribe_pipelined_small_queue(self):
+        source = self.get_source("news", "1update2create", "newsc")
+        store = scribe_pipelined(source, queue_size=1, chunk_size=8)
+        self.assertEqual(store.created_count, 3)
+        self.assertEqual(NewsC.objects.count(), 3)
+
+    @responses.activate
+    def test_scribe_pipelined_error_keeps_file(self):
+        source = self.get_source("news", "uniqueinvalid")
+        with self.assertRaises(IntegrityError):
+            source.scribe(pipelined=True)
+        store = source.store_set.get()
+        self.assertEqual(store.status, store.Status.LOADING)
+        self.assertEqual(News.objects.count(), 0)
+        self.assertTrue(default_storage.exists(store.file.name))
+
+    def get_merge_source(self, key, delete_missing=False):
+        source = self.get_source("news", key)
+        source.backend = ScribeSource.Backend.MERGE
+        source.key = "slug"
+        source.delete_missing = delete_missing
+        source.save()
+        return source
+
+    @override_settings(SCRIBE_STORE_SORT_RUN_SIZE=1, SCRIBE_STORE_CHUNK_SIZE=2)
+    @responses.activate
+    def test_merge_upsert(self):
+        pub_date = timezone.make_aware(timezone.datetime(2023, 6, 12))
+        News.objects.create(slug="hello-world", news_text="Hello", pub_date=pub_date)
+        News.objects.create(slug="a-old-news", news_text="Old", pub_date=pub_date)
+        source = self.get_merge_source("1update2create", delete_missing=True)
+        source.scribe()
+        store = source.store_set.latest("downloaded_at")
+        self.assertEqual(
+            (store.created_count, store.updated_count, store.deleted_count), (2, 1, 1)
+        )
+        self.assertEqual(News.objects.get(slug="hello-world").news_text, "Update!")
+        self.assertFalse(News.objects.filter(slug="a-old-news").exists())
+        self.assertEqual(
+            list(
+                store.row_set.order_by("object_index").values_list("status", flat=True)
+            ),
+            [
+                RowStatus.DELETED,
+                RowStatus.UPDATED,
+                RowStatus.CREATED,
+                RowStatus.CREATED,
+            ],
+        )
+        self.assertEqual(store.created().count(), 2)
+        source.scribe()
+        store = source.store_set.latest("downloaded_at")
+        self.assertEqual(store.ignored_count, 3)
+        self.assertEqual(store.updated_count + store.created_count, 0)
+        self.assertEqual(News.objects.count(), 3)
+
+    def get_manifest_source(self):
+        responses.add(
+            responses.GET,
+            "https://example.com/data",
+            body="# parts\nparts/1.csv\n\nhttps://example.com/parts/2.csv\n",
+        )
+        for name, rows in (("1", 2), ("2", 1)):
+            responses.add(
+                responses.GET,
+                "https://example.com/parts/%s.csv" % name,
+                body="question_text,pub_date\n"
+                + "".join(
+                    "Part %s-%s?,2023-06-1%s\n" % (name, i, i) for i in range(rows)
+                ),
+            )
+        return ScribeSource.objects.create(
+            slug="manifest",
+            url="https://example.com/data",
+            target=ContentType.objects.get(model="question"),
+            data_type=ScribeSource.DataType.MANIFEST,
+        )
+
+    @responses.activate
+    def test_manifest(self):
+        source = self.get_manifest_source()
+        source.scribe()
+        store = source.store_set.get()
+        self.assertEqual(store.status, store.Status.COMPLETED)
+        self.assertEqual(
+            list(
+                store.part_set.order_by("index").values_list(
+                    "row_count", "offset", "status", "counts"
+                )
+            ),
+            [(2, 0, "C", {"C": 2}), (1, 2, "C", {"C": 1})],
+        )
+        self.assertEqual(store.created_count, 3)
+        self.assertEqual(
+            store.row_set.get(object_index=3).target.question_text, "Part 2-0?"
+        )
+        name = store.part_set.get(index=1).file.name
+        store.prune()
+        self.assertFalse(default_storage.exists(name))
+
+    @responses.activate
+    def test_manifest_dry_run(self):
+        source = self.get_manifest_source()
+        directory = "scribe-store/part/%s" % source.slug
+
+        def part_files():
+            if not default_storage.exists(directory):
+                return []
+            return sorted(default_storage.listdir(directory)[1])
+
+        before = part_files()
+        report = source.scribe(dry_run=True)
+        self.assertEqual(report["rows"], 3)
+        self.assertEqual(report["counts"]["created"], 3)
+        self.assertEqual(ScribeStore.objects.count(), 0)
+        self.assertEqual(part_files(), before)
+
+    @responses.activate
+    def test_manifest_resume(self):
+        def part_rows(store, part):
+            if part.index == 1:
+                raise ScribeException("Interrupted")
+            return original(store, part)
+
+        original = manifest.part_rows
+        source = self.get_manifest_source()
+        self.delete_store_files(source)
+        with patch.object(manifest, "part_rows", side_effect=part_rows):
+            with self.assertRaises(ScribeException):
+                source.scribe()
+        store = source.store_set.get()
+        self.assertEqual(store.status, store.Status.LOADING)
+        self.assertEqual(
+            list(store.part_set.order_by("index").values_list("status", flat=True)),
+            ["C", "L"],
+        )
+        self.assertEqual(Question.objects.count(), 2)
+        with patch.object(manifest, "part_rows", wraps=original) as loaded:
+            store.load_file()
+        self.assertEqual([call.args[1].index for call in loaded.call_args_list], [1])
+        store.refresh_from_db()
+        self.assertEqual(store.status, store.Status.COMPLETED)
+        self.assertEqual((store.row_count, store.created_count), (3, 3))
+        self.assertEqual(Question.objects.count(), 3)
+
+    @responses.activate
+    def test_merge_preview(self):
+        pub_date = timezone.make_aware(timezone.datetime(2023, 6, 12))
+        News.objects.create(slug="hello-world", news_text="Hello", pub_date=pub_date)
+        source = self.get_merge_source("1update2create")
+        report = source.scribe(dry_run=True)
+        self.assertEqual(report["rows"], 3)
+        self.assertEqual(report["counts"]["created"], 2)
+        self.assertEqual(report["counts"]["updated"], 1)
+        self.assertEqual(News.objects.get().news_text, "Hello")
+
+    @responses.activate
+    def test_merge_duplicate_key(self):
+        source = self.get_merge_source("uniqueinvalid")
+        source.scribe()
+        store = source.store_set.get()
+        self.assertEqual(News.objects.count(), 2)
+        error = store.row_set.get(status=RowStatus.ERROR)
+        self.assertEqual(error.object_index, 2)
+        self.assertEqual(error.message, "Duplicate slug 'hello-world'.")
+
+    @responses.activate
+    def test_keyed_upsert(self):
+        pub_date = timezone.make_aware(timezone.datetime(2023, 6, 12))
+        News.objects.create(slug="hello-world", news_text="Hello", pub_date=pub_date)
+        source = self.get_source("news", "1update2create")
+        source.backend = ScribeSource.Backend.ORM
+        source.key = "slug"
+        source.save()
+        source.scribe()
+        store = source.store_set.latest("pk")
+        self.assertEqual(
+            (store.created_count, store.updated_count, store.ignored_count), (2, 1, 0)
+        )
+        self.assertEqual(News.objects.get(slug="hello-world").news_text, "Update!")
+        with CaptureQueriesContext(connection) as queries:
+            source.scribe()
+        store = source.store_set.latest("pk")
+        self.assertEqual(store.ignored_count, 3)
+        self.assertEqual(store.updated().count(), 0)
+        self.assertFalse(
+            [q for q in queries if q["sql"].startswith('UPDATE "sample_news"')]
+        )
+
+    @responses.activate
+    def test_keyed_upsert_repeated_key(self):
+        source = self.get_source("news", "uniqueinvalid")
+        source.backend = ScribeSource.Backend.ORM
+        source.key = "slug"
+        source.save()
+        source.scribe()
+        store = source.store_set.get()
+        self.assertEqual(
+            list(
+                store.row_set.order_by("object_index").values_list("status", flat=True)
+            ),
+            [RowStatus.CREATED, RowStatus.UPDATED, RowStatus.CREATED],
+        )
+        self.assertEqual(
+            News.objects.get(slug="hello-world").news_text, "Hello, world 2!"
+        )
+
     @responses.activate
     def test_news_simple(self):
         self.assertEqual(News.objects.count(), 0)
@@ -179,6 +868,64 @@ class ScribeTest(TestCase):
         self.assertEqual(store.updated().count(), 1)
         self.assertEqual(store.related().count(), 2)
 
+    @responses.activate
+    def test_status_counts(self):
+        source = self.get_source("news", "uniqueinvalid", "newsc")
+        source.scribe()
+        store = source.store_set.get()
+        self.assertEqual((store.created_count, store.updated_count), (2, 1))
+        self.assertEqual(store.error_count, 0)
+        store.delete_created()
+        store.refresh_from_db()
+        self.assertEqual((store.created_count, store.deleted_count), (0, 2))
+
+    @responses.activate
+    def test_admin_scriberow_changelist(self):
+        self.scribe_sample_question("simple")
+        user = get_user_model().objects.create_superuser("admin", "", "admin")
+        self.client.force_login(user)
+        url = reverse("admin:scribe_store_scriberow_changelist")
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertContains(response, "3 scribe rows")
+
+    @responses.activate
+    def test_export_csv(self):
+        source = self.get_source("news", "uniqueinvalid", "newsc")
+        self.delete_store_files(source)
+        source.scribe()
+        store = source.store_set.get()
+        lines = list(store.iter_csv(chunk_size=2))
+        self.assertEqual(
+            lines[0], "object_index,status,data,id,slug,news_text,pub_date\r\n"
+        )
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[2].startswith('2,U,"{""slug"": ""hello-world""'))
+        self.assertIn(",1,hello-world,", lines[2])
+        self.assertEqual(len(list(store.iter_csv(status=RowStatus.UPDATED))), 2)
+        store.archive_rows()
+        self.assertEqual(list(store.iter_csv(chunk_size=2)), lines)
+
+    @responses.activate
+    def test_export_command_and_admin(self):
+        source = self.scribe_sample_question("simple")
+        store = source.store_set.get()
+        path = default_storage.path("export.csv")
+        self.addCleanup(default_storage.delete, "export.csv")
+        call_command("scribe_export", store.slug, "--status", "created", "-o", path)
+        with open(path, newline="") as fp:
+            self.assertEqual(fp.read(), "".join(store.iter_csv()))
+        user = get_user_model().objects.create_superuser("admin", "", "admin")
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse("admin:scribe_store_scribestore_changelist"),
+            {"action": "export_csv", "_selected_action": [store.pk]},
+        )
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(
+            b"".join(response.streaming_content).decode(), "".join(store.iter_csv())
+        )
+
     @responses.activate
     def test_delete_created(self):
         self.scribe_sample_news("uniqueinvalid", "newsc")
@@ -194,6 +941,30 @@ class ScribeTest(TestCase):
         store.delete_created()
         self.assertEqual(NewsC.objects.count(), 2)
 
+    @responses.activate
+    def test_scribe_dict_unchanged(self):
+        source = self.get_source("news", "1update2create", "newsc")
+        source.scribe()
+        with CaptureQueriesContext(connection) as queries:
+            source.scribe()
+        store = source.store_set.latest("pk")
+        self.assertEqual(store.ignored_count, 3)
+        self.assertEqual(store.updated().count(), 0)
+        self.assertFalse(
+            [q["sql"] for q in queries if 'UPDATE "sample_newsc"' in q["sql"]]
+        )
+
+    @responses.activate
+    def test_delete_created_pruned(self):
+        source = self.scribe_sample_question("simple")
+        store = source.store_set.get()
+        store.prune(keep_lineage=True)
+        store = ScribeStore.objects.get(pk=store.pk)
+        self.assertFalse(store.file)
+        store.delete_created()
+        self.assertEqual(Question.objects.count(), 0)
+        self.assertEqual(store.status, store.Status.DELETED)
+
     @responses.activate
     def test_command_scribe_new(self):
         self.add_rewponses("question", "simple")
@@ -218,6 +989,54 @@ class ScribeTest(TestCase):
         self.assertEqual(ScribeStore.objects.count(), 0)
         self.assertEqual(Question.objects.count(), 0)
 
+    @responses.activate
+    def test_command_scribe_new_dry_run(self):
+        self.add_rewponses("question", "simple")
+        with patch("djclick.echo") as echo:
+            call_command(
+                "scribe_new",
+                "simple-question",
+                "https://example.com/data",
+                "question",
+                "--dry-run",
+            )
+        lines = [c.args[0] for c in echo.call_args_list]
+        self.assertIn("created: 3", lines)
+        self.assertIn("error rate: 0.00%", lines)
+        self.assertEqual(ScribeSource.objects.count(), 0)
+        self.assertEqual(ScribeStore.objects.count(), 0)
+        self.assertEqual(Question.objects.count(), 0)
+
+    @responses.activate
+    def test_preview(self):
+        source = self.get_source("news", "uniqueinvalid", "newsc")
+        report = source.scribe(dry_run=True)
+        self.assertEqual(report["counts"]["created"], 2)
+        self.assertEqual(report["counts"]["updated"], 1)
+        self.assertEqual(report["estimated_rows"], 3)
+        self.assertEqual(report["projected_lineage_rows"], 3)
+        self.assertEqual(ScribeStore.objects.count(), 0)
+        self.assertEqual(NewsC.objects.count(), 0)
+
+    def test_preview_sample(self):
+        lines = ["question_text,pub_date"]
+        lines += ["Question %04d?,2023-06-12" % i for i in range(500)]
+        source = ScribeSource.objects.create(
+            slug="sample",
+            url="https://example.com/data",
+            target=ContentType.objects.get(model="question"),
+        )
+        store = ScribeStore(source=source, url=source.url)
+        store.file.save("sample.csv", ContentFile("\n".join(lines) + "\n"))
+        self.addCleanup(store.file.delete, save=False)
+        report = store.preview(sample=50, seed=1)
+        self.assertTrue(report["sampled"])
+        self.assertLessEqual(report["rows"], 50)
+        self.assertEqual(report["counts"]["created"], report["rows"])
+        self.assertEqual(report["estimated_rows"], 500)
+        self.assertEqual(report["projected_counts"]["created"], 500)
+        self.assertEqual(Question.objects.count(), 0)
+
     @responses.activate
     def test_command_scribe(self):
         self.add_rewponses("question", "simple")
@@ -273,3 +1092,143 @@ class ScribeTest(TestCase):
         self.assertEqual(Question.objects.count(), 6)
         store_1.refresh_from_db()
         self.assertEqual(store_1.status, store_1.Status.COMPLETED)
+
+
+class NativeBackendTest(ScribeTest):
+    def get_source(self, category, key, target_name=None):
+        source = super().get_source(category, key, target_name)
+        source.backend = ScribeSource.Backend.NATIVE
+        source.save()
+        return source
+
+    @responses.activate
+    def test_native_lineage(self):
+        Question.objects.create(question_text="Existing", pub_date=timezone.now())
+        source = self.scribe_sample_question("simple")
+        store = source.store_set.get()
+        self.assertEqual(store.status, store.Status.COMPLETED)
+        self.assertEqual(Question.objects.count(), 4)
+        self.assertEqual(store.created().count(), 3)
+        row = store.row_set.get(object_index=2)
+        self.assertEqual(row.target.question_text, "How is the date converted?")
+        self.assertEqual(
+            timezone.localtime(row.target.pub_date).date().isoformat(), "2023-06-13"
+        )
+        question = Question.objects.create(
+            question_text="Next", pub_date=timezone.now()
+        )
+        self.assertGreater(question.pk, row.object_id)
+
+    @responses.activate
+    def test_native_key(self):
+        source = self.get_source("news", "simple")
+        source.key = "slug"
+        with self.assertRaises(ValidationError):
+            source.full_clean()
+        source.save()
+        with self.assertRaises(ScribeException):
+            source.scribe()
+
+    @responses.activate
+    def test_native_scribe_dict_uses_orm(self):
+        source = self.get_source("news", "uniqueinvalid", "newsc")
+        source.scribe()
+        store = source.store_set.get()
+        self.assertEqual(store.created().count(), 2)
+        self.assertEqual(store.updated().count(), 1)
+
+
+@override_settings(
+    DATABASE_ROUTERS=["scribe_store.routers.ScribeStoreRouter"],
+    SCRIBE_STORE_DATABASE="lineage",
+)
+class LineageDatabaseTest(ScribeTest):
+    databases = {"default", "lineage"}
+
+    @responses.activate
+    def test_admin_scriberow_changelist(self):
+        self.scribe_sample_question("simple")
+        user = get_user_model().objects.create_superuser("admin", "", "admin")
+        self.client.force_login(user)
+        url = reverse("admin:scribe_store_scriberow_changelist")
+        with self.assertNumQueries(3), self.assertNumQueries(3, using="lineage"):
+            response = self.client.get(url)
+        self.assertContains(response, "3 scribe rows")
+
+    @responses.activate
+    def test_checkpoint(self):
+        source = self.get_source("question", "simple")
+        with override_settings(SCRIBE_STORE_CHUNK_SIZE=2):
+            source.scribe()
+        store = source.store_set.get()
+        self.assertEqual(store.checkpoint, 3)
+        self.assertEqual(ScribeRow.objects.using("default").count(), 0)
+        self.assertEqual(ScribeRow.objects.using("lineage").count(), 3)
+        self.assertEqual(Question.objects.using("lineage").count(), 0)
+        row = store.row_set.get(object_index=1)
+        self.assertEqual(row.target.question_text, "Is this a question?")
+
+
+class BenchmarkTest(TestCase):
+    def test_scenarios(self):
+        results = run(list(SCENARIOS), rows=20, columns=2)
+        self.assertEqual(set(results), set(SCENARIOS))
+        self.assertEqual(results["create"]["count"], 20)
+        self.assertLess(results["create-native"]["queries_per_unit"], 1)
+        self.assertGreater(
+            results["scribe-dict-update"]["queries_per_unit"],
+            results["scribe-dict-ignore"]["queries_per_unit"],
+        )
+        self.assertEqual(compare(results["create"], results["create"], 0.2), [])
+        self.assertEqual(News.objects.count(), 0)
+
+
+class AsyncTest(TransactionTestCase):
+    """``aload_file`` loads in a worker thread, outside of a test transaction."""
+
+    def get_async_client(self, category, key, status=200):
+        import httpx
+
+        with open("sample/data/%s/%s.csv" % (category, key), "rb") as fp:
+            content = fp.read()
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(status, content=content)
+        )
+        return httpx.AsyncClient(transport=transport), content
+
+    def test_ascribe(self):
+        client, content = self.get_async_client("question", "simple")
+        source = ScribeSource.objects.create(
+            slug="simple",
+            url="https://example.com/data",
+            target=ContentType.objects.get(model="question"),
+        )
+        async_to_sync(source.ascribe)(client)
+        store = source.store_set.get()
+        self.assertEqual(store.status, store.Status.COMPLETED)
+        self.assertEqual(Question.objects.count(), 3)
+        with store.file.open("rb") as fp:
+            self.assertEqual(fp.read(), content)
+        self.assertEqual(store.size, len(content))
+
+    def test_afetch_closes_client(self):
+        client, _ = self.get_async_client("question", "simple")
+        source = ScribeSource.objects.create(
+            slug="simple",
+            url="https://example.com/data",
+            target=ContentType.objects.get(model="question"),
+        )
+        with patch.object(aio, "new_client", return_value=client):
+            async_to_sync(source.afetch)()
+        self.assertTrue(client.is_closed)
+
+    def test_afetch_http_exception(self):
+        client, _ = self.get_async_client("question", "simple", status=403)
+        source = ScribeSource.objects.create(
+            slug="simple",
+            url="https://example.com/data",
+            target=ContentType.objects.get(model="question"),
+        )
+        with self.assertRaises(BadHttpStatusException):
+            async_to_sync(source.afetch)(client)
+        self.assertEqual(ScribeStore.objects.count(), 0)
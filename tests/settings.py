@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -83,6 +84,20 @@ DATABASES = {
     }
 }
 
+# Run the test suite against a local PostgreSQL instance.
+# Connection parameters are read from libpq environment variables (PGHOST, ...).
+if os.environ.get("SCRIBE_STORE_TEST_POSTGRES"):
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ.get("PGDATABASE", "scribe_store"),
+    }
+
+# A database for the lineage of LineageDatabaseTest, see ScribeStoreRouter.
+DATABASES["lineage"] = {
+    "ENGINE": "django.db.backends.sqlite3",
+    "NAME": "lineage.db",
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators